@@ -1,6 +1,14 @@
 import telebot
 from telebot import types
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import io
+import asyncio
+import concurrent.futures
+import gzip
+import shutil
 from dotenv import load_dotenv
 import logging
 from scraper import get_empty_cells, dump_all_cells
@@ -8,12 +16,20 @@ import json
 from datetime import datetime
 import openai
 import re
-from collections import defaultdict
+import queue
+import threading
+import time
+from collections import defaultdict, deque
 from config import (
     DEMO_URL, REAL_URL, TABLE_DESCRIPTIONS, MAX_CELLS_PER_CATEGORY
 )
 import cleanup  # Импортируем модуль очистки данных
 
+try:
+    import orjson  # Быстрая сериализация JSON (C-расширение)
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -27,7 +43,18 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 # Получаем ключи OpenAI и ассистента из переменных окружения
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_ASSISTANT_ID = os.getenv('OPENAI_ASSISTANT_ID')
-OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4.1-Nano')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4.1-nano')
+
+# Ограничения запроса к OpenAI: длина ответа в токенах и длина описания одной ячейки в промпте
+OPENAI_MAX_TOKENS = 400
+AI_CELL_MAX_CHARS = 200
+
+# Интервал опроса статуса ассистента OpenAI (секунды): от начального, удваивается до максимального
+ASSISTANT_POLL_INITIAL_DELAY = 0.25
+ASSISTANT_POLL_MAX_DELAY = 2
+
+# Максимум одновременных запросов к OpenAI при анализе нескольких таблиц
+OPENAI_MAX_CONCURRENCY = 10
 
 # Initialize OpenAI client if API key is available
 openai_client = None
@@ -37,7 +64,7 @@ if OPENAI_API_KEY:
         openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
         logger.info("OpenAI client initialized using new API")
     except Exception as e:
-        logger.warning(f"Error initializing OpenAI client: {e}")
+        logger.warning("Error initializing OpenAI client: %s", e)
         openai_client = None
         logger.warning("OpenAI client could not be initialized. AI explanation features will be disabled.")
 else:
@@ -46,8 +73,57 @@ else:
 # Initialize bot
 bot = telebot.TeleBot(BOT_TOKEN)
 
-# Storage for user comments
-comments_db = {}
+# Общая HTTP-сессия для всех запросов к api.telegram.org: пул соединений (keep-alive)
+# переиспользуется всеми потоками, ошибки соединения (в том числе закрытые сервером
+# keep-alive соединения) повторяются с задержкой
+telegram_session = requests.Session()
+telegram_session.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.3),
+))
+telebot.apihelper.session = telegram_session
+
+# Размер буфера для чтения/записи JSON-файлов (64 КБ)
+JSON_IO_BUFFER_SIZE = 1 << 16
+
+# Максимальная длина одного сообщения (лимит Telegram - 4096 символов)
+MESSAGE_CHUNK_LIMIT = 3900
+
+# Чаты, для которых сейчас выполняется проверка: chat_id -> Future сканирования
+# (None - проверка уже заявлена, но еще не запущена). Доступ только под блокировкой.
+_checking_chats = {}
+_checking_lock = threading.Lock()
+
+# Пул потоков для сканирования страниц, чтобы не блокировать обработчики сообщений бота
+SCRAPE_MAX_WORKERS = 4
+_SCRAPE_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=SCRAPE_MAX_WORKERS, thread_name_prefix="scrape")
+
+# Результаты меньше этого размера (в байтах) не отправляются отдельным файлом,
+# если все находки уже поместились в текст ответа
+INLINE_RESULT_MAX_BYTES = 8192
+
+# Очередь исходящих сообщений с ограничением частоты (лимит Telegram - 30 сообщений в секунду)
+SEND_RATE_LIMIT = 29
+_send_queue = queue.Queue()
+
+# Кэш результатов сканирования: url -> (время получения, список пустых ячеек)
+SCRAPE_TTL = 30  # Время жизни кэша в секундах
+_SCRAPE_CACHE = {}
+
+# Файл-указатель на результаты последней проверки (обновляется атомарно при каждом сохранении)
+LATEST_EMPTY_CELLS_FILE = "empty_cells_latest.json.gz"
+
+# Уровень сжатия gzip для файлов результатов (1 - самый быстрый, JSON сжимается в разы)
+RESULTS_GZIP_LEVEL = 1
+
+# Кэш последнего файла с результатами проверки для /stats
+_stats_cache = {"path": None, "mtime": 0, "data": None}
+
+# Комментарии к находкам: одна JSON-строка на комментарий, новые строки дописываются в конец.
+# Старый файл comments.json (весь словарь целиком) только читается.
+COMMENTS_FILE = 'comments.jsonl'
+LEGACY_COMMENTS_FILE = 'comments.json'
 
 SIGNAL_PHONE = os.getenv('SIGNAL_PHONE')
 
@@ -58,11 +134,11 @@ def send_signal_message(message):
     # Проверяем доступность Java для запуска signal-cli
     try:
         java_version = subprocess.check_output(['java', '-version'], stderr=subprocess.STDOUT)
-        logger.debug(f"Java найдена: {java_version}")
+        logger.debug("Java найдена: %s", java_version)
     except Exception as e:
-        logger.warning(f"Java не найдена: {e}")
+        logger.warning("Java не найдена: %s", e)
         logger.info("Запустим команду для проверки работы механизма без фактической отправки.")
-        logger.info(f"[ИМИТАЦИЯ] Отправка Signal сообщения: {message} на номер {SIGNAL_PHONE}")
+        logger.info("[ИМИТАЦИЯ] Отправка Signal сообщения: %s на номер %s", message, SIGNAL_PHONE)
         return
     
     sender = '+4916095030120'  # Ваш зарегистрированный номер Signal (без угловых скобок)
@@ -90,7 +166,7 @@ def send_signal_message(message):
             # Пробуем получить список устройств, чтобы проверить регистрацию
             subprocess.run(check_cmd, check=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
         except subprocess.CalledProcessError:
-            logger.error(f"Отправитель {sender} не зарегистрирован в Signal. Запустите register-signal-cli.ps1 для регистрации.")
+            logger.error("Отправитель %s не зарегистрирован в Signal. Запустите register-signal-cli.ps1 для регистрации.", sender)
             return f"Ошибка: номер {sender} не зарегистрирован в Signal. Запустите register-signal-cli.ps1 для регистрации."
         
         # Используем текущую директорию для запуска команды
@@ -105,12 +181,45 @@ def send_signal_message(message):
             '-m', message,
             SIGNAL_PHONE
         ]
-        logger.debug(f"Выполняем команду: {' '.join(cmd)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Выполняем команду: %s", ' '.join(cmd))
         
         subprocess.run(cmd, check=True)
-        logger.info(f"Signal уведомление отправлено на {SIGNAL_PHONE}")
+        logger.info("Signal уведомление отправлено на %s", SIGNAL_PHONE)
     except Exception as e:
-        logger.error(f"Ошибка отправки в Signal: {e}")
+        logger.error("Ошибка отправки в Signal: %s", e)
+
+def send_worker():
+    """Фоновый поток для отправки сообщений из очереди не чаще SEND_RATE_LIMIT в секунду"""
+    sent_times = deque()
+    
+    while True:
+        func, args, kwargs = _send_queue.get()
+        try:
+            # Оставляем в окне только отправки за последнюю секунду
+            now = time.monotonic()
+            while sent_times and now - sent_times[0] >= 1:
+                sent_times.popleft()
+            
+            if len(sent_times) >= SEND_RATE_LIMIT:
+                time.sleep(1 - (now - sent_times.popleft()))
+            
+            func(*args, **kwargs)
+        except Exception as e:
+            logger.error("Ошибка при отправке сообщения из очереди: %s", e)
+        finally:
+            sent_times.append(time.monotonic())
+            _send_queue.task_done()
+
+def start_send_worker():
+    """Запускает фоновый поток отправки сообщений"""
+    send_thread_obj = threading.Thread(target=send_worker, daemon=True)
+    send_thread_obj.start()
+    return send_thread_obj
+
+def queue_send(func, *args, **kwargs):
+    """Ставит вызов метода бота (reply_to, send_message, ...) в очередь на отправку"""
+    _send_queue.put((func, args, kwargs))
 
 @bot.message_handler(commands=['start'])
 def start_command(message):
@@ -128,95 +237,254 @@ def start_command(message):
                 "Нажмите на кнопку ниже или используйте команду из меню.",
                 reply_markup=markup)
 
+# Описания таблиц из конфигурации: ключевые слова в нижнем регистре и одно
+# регулярное выражение для поиска любого из них (длинные слова проверяются первыми)
+TABLE_DESCRIPTIONS_LC = {keyword.lower(): description for keyword, description in TABLE_DESCRIPTIONS.items()}
+_TABLE_DESC_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(TABLE_DESCRIPTIONS_LC, key=len, reverse=True))
+) if TABLE_DESCRIPTIONS_LC else None
+
+def get_table_description(table_id):
+    """Возвращает описание таблицы из TABLE_DESCRIPTIONS по ключевому слову в ее идентификаторе"""
+    if _TABLE_DESC_RE is None:
+        return None
+    match = _TABLE_DESC_RE.search(table_id.lower())
+    return TABLE_DESCRIPTIONS_LC[match.group(0)] if match else None
+
+# Части описания ячейки (между запятыми), содержащие item/row/column
+_CELL_KEY_RE = re.compile(r'[^,]*(?:item|row|column)[^,]*', re.IGNORECASE)
+
+def get_cell_key(cell):
+    """Создает ключ для определения уникальности ячейки (только части без служебной информации)"""
+    return '|'.join(match.group(0).strip() for match in _CELL_KEY_RE.finditer(cell))
+
 def organize_empty_cells(empty_cells):
     """Организует пустые ячейки в структурированный формат по категориям"""
-    organized_cells = {}
+    organized_cells = defaultdict(list)
     
     for cell in empty_cells:
-        parts = cell.split(',', 1)  # Разделяем на идентификатор таблицы и остальную информацию
+        # Разделяем на идентификатор таблицы и остальную информацию
+        table_id, sep, info = cell.partition(',')
         
-        if len(parts) > 1:
-            table_id = parts[0].strip()
-            info = parts[1].strip()
-            
-            if table_id not in organized_cells:
-                organized_cells[table_id] = []
-            
-            organized_cells[table_id].append(info)
+        if sep:
+            organized_cells[table_id.strip()].append(info.strip())
         else:
             # Если формат не соответствует ожидаемому, добавляем в "Другое"
-            if "Другое" not in organized_cells:
-                organized_cells["Другое"] = []
-            
             organized_cells["Другое"].append(cell)
     
-    return organized_cells
+    return dict(organized_cells)
+
+def dumps_json(data):
+    """Сериализует данные в JSON (байты UTF-8), используя orjson, если он установлен"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+
+def dumps_json_line(data):
+    """Сериализует данные в одну строку JSON (байты UTF-8 с переводом строки) для JSONL-файлов"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(data, ensure_ascii=False) + "\n").encode('utf-8')
 
-def save_empty_cells_to_file(empty_cells):
-    """Сохраняет список пустых ячеек в JSON-файл с датой и временем"""
-    current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"empty_cells_{current_time}.json"
+def dumps_json_compact(data):
+    """Сериализует данные в компактную строку JSON без отступов (для промптов ИИ)"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def loads_json(raw):
+    """Разбирает JSON из байтов, используя orjson, если он установлен"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def read_json_file(path):
+    """Читает JSON-файл, в том числе сжатый gzip (*.gz)"""
+    with open(path, 'rb', buffering=JSON_IO_BUFFER_SIZE) as f:
+        raw = f.read()
+    if path.endswith(".gz"):
+        raw = gzip.decompress(raw)
+    return loads_json(raw)
+
+def save_empty_cells_to_file(empty_cells, organized_cells=None):
+    """
+    Сохраняет список пустых ячеек в сжатый gzip JSON-файл с датой и временем
+    
+    Args:
+        empty_cells (list): Полный список пустых ячеек
+        organized_cells (dict, optional): Уникальные ячейки, уже разбитые по категориям
+            (сохраняются в файл, чтобы /stats не пересчитывал их)
+    
+    Returns:
+        tuple: (имя файла, сжатое содержимое файла в байтах) или (None, None) при ошибке
+    """
+    # Одно и то же время для имени файла и метки внутри файла
+    now = datetime.now()
+    current_time = now.strftime("%Y-%m-%d_%H-%M-%S")
+    filename = f"empty_cells_{current_time}.json.gz"
     
     data = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "empty_cells": empty_cells
     }
+    if organized_cells is not None:
+        data["organized"] = organized_cells
+        data["unique_count"] = sum(len(cells) for cells in organized_cells.values())
     
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # Сериализуем и сжимаем целиком в памяти, записываем одним вызовом
+        payload = gzip.compress(dumps_json(data), compresslevel=RESULTS_GZIP_LEVEL)
+        with open(filename, 'wb', buffering=JSON_IO_BUFFER_SIZE) as f:
+            f.write(payload)
         
-        return filename
+        update_latest_empty_cells_file(filename, payload)
+        
+        # Новый файл всегда самый свежий - кладем его сразу в кэш
+        _stats_cache.update(path=filename, mtime=os.stat(filename).st_mtime, data=data)
+        
+        return filename, payload
+    except Exception as e:
+        logger.error("Error saving empty cells to file: %s", e)
+        return None, None
+
+def update_latest_empty_cells_file(filename, payload):
+    """Атомарно заменяет LATEST_EMPTY_CELLS_FILE новым файлом результатов"""
+    tmp_latest = LATEST_EMPTY_CELLS_FILE + ".tmp"
+    try:
+        if os.path.exists(tmp_latest):
+            os.remove(tmp_latest)
+        try:
+            # Жесткая ссылка не копирует данные
+            os.link(filename, tmp_latest)
+        except OSError:
+            with open(tmp_latest, 'wb', buffering=JSON_IO_BUFFER_SIZE) as f:
+                f.write(payload)
+        os.replace(tmp_latest, LATEST_EMPTY_CELLS_FILE)
     except Exception as e:
-        logger.error(f"Error saving empty cells to file: {str(e)}")
+        logger.warning("Не удалось обновить %s: %s", LATEST_EMPTY_CELLS_FILE, e)
+
+def find_latest_empty_cells_file():
+    """Ищет самый свежий файл empty_cells_*.json(.gz) в текущей директории"""
+    # Обычно достаточно файла-указателя, полный просмотр директории - только если его нет
+    try:
+        return LATEST_EMPTY_CELLS_FILE, os.stat(LATEST_EMPTY_CELLS_FILE).st_mtime
+    except OSError:
+        pass
+    
+    latest_path = None
+    latest_mtime = 0
+    with os.scandir('.') as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("empty_cells_") and name.endswith((".json", ".json.gz")) and entry.is_file():
+                mtime = entry.stat().st_mtime
+                if latest_path is None or mtime > latest_mtime:
+                    latest_path = name
+                    latest_mtime = mtime
+    return latest_path, latest_mtime
+
+def load_latest_empty_cells():
+    """
+    Возвращает данные последней проверки, используя кэш
+
+    Returns:
+        dict: Содержимое последнего файла empty_cells_*.json(.gz) или None, если файлов нет
+    """
+    cached_path = _stats_cache["path"]
+    if cached_path and _stats_cache["data"] is not None:
+        try:
+            if os.stat(cached_path).st_mtime == _stats_cache["mtime"]:
+                return _stats_cache["data"]
+        except OSError:
+            # Файл мог быть удален очисткой - ищем заново
+            pass
+    
+    latest_file, latest_mtime = find_latest_empty_cells_file()
+    if not latest_file:
+        _stats_cache.update(path=None, mtime=0, data=None)
         return None
+    
+    data = read_json_file(latest_file)
+    
+    _stats_cache.update(path=latest_file, mtime=latest_mtime, data=data)
+    return data
+
+def get_empty_cells_cached(url, fresh=False):
+    """
+    Возвращает пустые ячейки для URL, повторно используя недавний результат сканирования
+    
+    Args:
+        url (str): URL страницы для анализа
+        fresh (bool): Игнорировать кэш и выполнить сканирование заново
+        
+    Returns:
+        list: Список строк с описанием пустых ячеек
+    """
+    now = time.monotonic()
+    entry = _SCRAPE_CACHE.get(url)
+    if entry and not fresh and now - entry[0] < SCRAPE_TTL:
+        logger.info("Используем кэшированный результат сканирования для %s", url)
+        return entry[1]
+    
+    empty_cells = get_empty_cells(url)
+    _SCRAPE_CACHE[url] = (now, empty_cells)
+    return empty_cells
 
 @bot.message_handler(commands=['check'])
 def check_empty_cells(message):
-    # Проверяем, не запущена ли уже проверка для этого чата
+    # Проверяем, не запущена ли уже проверка для этого чата, и сразу отмечаем ее запуск
     chat_id = message.chat.id
-    if hasattr(bot, 'checking_chats') and chat_id in bot.checking_chats:
+    with _checking_lock:
+        already_checking = chat_id in _checking_chats
+        if not already_checking:
+            _checking_chats[chat_id] = None
+    
+    if already_checking:
         bot.reply_to(message, "Проверка уже выполняется. Пожалуйста, дождитесь её завершения.")
         return
     
-    # Отмечаем, что для этого чата запущена проверка
-    if not hasattr(bot, 'checking_chats'):
-        bot.checking_chats = set()
-    bot.checking_chats.add(chat_id)
+    # Получаем аргументы команды (если переданы)
+    command_args = {arg.lower() for arg in message.text.split()[1:]}
+    use_demo = "demo" in command_args
     
-    # Сообщаем пользователю о начале проверки
-    sent_msg = bot.reply_to(message, "Начинаю проверку незаполненных ячеек...\nЭто может занять до 30 секунд.")
+    # Сообщаем пользователю о начале проверки (и об использовании демо-URL - в том же сообщении)
+    start_text = "Начинаю проверку незаполненных ячеек...\nЭто может занять до 30 секунд."
+    if use_demo:
+        start_text += f"\nИспользую демо-URL: {DEMO_URL}"
     
     try:
-        # Проверяем наличие реального URL
-        url = REAL_URL if REAL_URL else DEMO_URL
+        bot.reply_to(message, start_text)
         
-        # Получаем аргументы команды (если переданы)
-        command_args = message.text.split()
-        if len(command_args) > 1 and command_args[1].lower() == "demo":
-            url = DEMO_URL
-            bot.reply_to(message, f"Использую демо-URL: {DEMO_URL}")
+        # Проверяем наличие реального URL
+        url = DEMO_URL if use_demo or not REAL_URL else REAL_URL
         
+        # Сканируем страницу в пуле потоков ("fresh" - игнорировать кэш и сканировать заново);
+        # результат обработает finish_check, обработчик сразу освобождается для других сообщений
+        future = _SCRAPE_POOL.submit(get_empty_cells_cached, url, "fresh" in command_args)
+    except Exception as e:
+        logger.error("Error starting empty cells check: %s", e)
+        bot.reply_to(message, f"Произошла ошибка при проверке таблицы: {str(e)}")
+        with _checking_lock:
+            _checking_chats.pop(chat_id, None)
+        return
+    
+    with _checking_lock:
+        _checking_chats[chat_id] = future
+    future.add_done_callback(lambda done_future: finish_check(message, done_future))
+
+def finish_check(message, future):
+    """Обрабатывает результат сканирования для /check и отправляет ответ пользователю"""
+    chat_id = message.chat.id
+    try:
         # Получаем пустые ячейки
-        empty_cells = get_empty_cells(url)
+        empty_cells = future.result()
         
         # Удаляем дубликаты для уменьшения объема вывода
-        unique_cells = []
-        unique_cell_texts = set()
+        # (сохраняется первая ячейка для каждого ключа, порядок не меняется)
+        seen_cells = {}
         for cell in empty_cells:
-            # Создаем ключ для определения уникальности ячейки
-            # (берем только части без служебной информации)
-            key_parts = []
-            for part in cell.split(','):
-                if not any(x in part.lower() for x in ["item", "row", "column"]):
-                    continue
-                key_parts.append(part.strip())
-            
-            cell_key = '|'.join(key_parts)
-            
-            if cell_key not in unique_cell_texts:
-                unique_cells.append(cell)
-                unique_cell_texts.add(cell_key)
+            seen_cells.setdefault(get_cell_key(cell), cell)
+        unique_cells = list(seen_cells.values())
         
         if not unique_cells:
             bot.reply_to(message, "Все ячейки заполнены!")
@@ -245,11 +513,11 @@ def check_empty_cells(message):
         }
         
         findings_filename = f"findings_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(findings_filename, 'w', encoding='utf-8') as f:
-            json.dump(findings_data, f, ensure_ascii=False, indent=2)
+        with open(findings_filename, 'wb', buffering=JSON_IO_BUFFER_SIZE) as f:
+            f.write(dumps_json(findings_data))
         
         # Сохраняем также сырые данные пустых ячеек
-        raw_filename = save_empty_cells_to_file(empty_cells)
+        raw_filename, raw_payload = save_empty_cells_to_file(empty_cells, organized_cells)
         
         # Формируем ответное сообщение
         response = f"Найдены незаполненные ячейки: {len(unique_cells)}\n\n"
@@ -258,108 +526,82 @@ def check_empty_cells(message):
         # Выбираем до 10 наиболее характерных находок для анализа
         sample_findings = {}
         for table_id, cells in findings_with_ids.items():
-            sample_findings[table_id] = cells[:min(3, len(cells))]  # Берем максимум 3 примера с каждой таблицы
+            sample_findings[table_id] = cells[:3]  # Берем максимум 3 примера с каждой таблицы
         
         # Запрос анализа от AI
         ai_explanation = get_ai_explanation(sample_findings)
         
-        # Telegram имеет ограничение в 4096 символов на сообщение
-        messages = []
-        current_message = response
+        # Формируем полный отчет по категориям (части копим в списке и склеиваем один раз)
+        report_parts = [response]
+        max_cells = MAX_CELLS_PER_CATEGORY
         
-        # Формируем сообщения по категориям
         for table_id, cells in findings_with_ids.items():
-            # Если добавление категории превысит лимит, создаем новое сообщение
-            category_header = f"📊 {table_id} ({len(cells)} ячеек):\n"
-            
-            if len(current_message) + len(category_header) > 3900:
-                messages.append(current_message)
-                current_message = category_header
-            else:
-                current_message += category_header
+            cells_count = len(cells)
+            report_parts.append(f"📊 {table_id} ({cells_count} ячеек):\n")
                 
-            # Добавляем первые 5 ячеек из категории с ID
-            for i, cell_data in enumerate(cells[:MAX_CELLS_PER_CATEGORY]):
-                finding_id = cell_data["id"]
-                cell_description = cell_data["description"]
-                cell_text = f"   - #{finding_id} {cell_description}\n"
-                
-                if len(current_message) + len(cell_text) > 3900:
-                    messages.append(current_message)
-                    current_message = cell_text
-                else:
-                    current_message += cell_text
+            # Добавляем первые 5 ячеек из категории с ID (без копирования списка, если он короче)
+            shown_cells = cells if cells_count <= max_cells else cells[:max_cells]
+            for cell_data in shown_cells:
+                report_parts.append(f"   - #{cell_data['id']} {cell_data['description']}\n")
             
             # Если в категории больше установленного лимита ячеек, добавляем информацию об остальных
-            if len(cells) > MAX_CELLS_PER_CATEGORY:
-                remaining_text = f"   - ... и еще {len(cells) - MAX_CELLS_PER_CATEGORY} пустых ячеек\n\n"
-                
-                if len(current_message) + len(remaining_text) > 3900:
-                    messages.append(current_message)
-                    current_message = remaining_text
-                else:
-                    current_message += remaining_text
+            if cells_count > max_cells:
+                report_parts.append(f"   - ... и еще {cells_count - max_cells} пустых ячеек\n\n")
             else:
-                current_message += "\n"
+                report_parts.append("\n")
                 
             # Добавляем дополнительную информацию из конфигурации
-            for keyword, description in TABLE_DESCRIPTIONS.items():
-                if keyword in table_id.lower():
-                    info = f"{description}\n"
-                    if len(current_message) + len(info) > 3900:
-                        messages.append(current_message)
-                        current_message = info
-                    else:
-                        current_message += info
-                    break
+            description = get_table_description(table_id)
+            if description:
+                report_parts.append(f"{description}\n")
         
         # Добавляем информация для комментирования находок
         comment_info = "\n💬 Для комментирования конкретной находки, ответьте на это сообщение, указав ID находки (например, для находки #5: 'Требуется заполнить телефон пациента').\n"
-        
-        if len(current_message) + len(comment_info) > 3900:
-            messages.append(current_message)
-            current_message = comment_info
-        else:
-            current_message += comment_info
+        report_parts.append(comment_info)
             
         # Добавляем информацию о сохраненных файлах
         if raw_filename:
-            file_info = f"💾 Полный список сохранен в файл: {raw_filename}\n"
-            
-            if len(current_message) + len(file_info) > 3900:
-                messages.append(current_message)
-                current_message = file_info
-            else:
-                current_message += file_info
+            report_parts.append(f"💾 Полный список сохранен в файл: {raw_filename}\n")
         
-        # Добавляем последнее сообщение, если оно не пустое
-        if current_message:
-            messages.append(current_message)
+        report = "".join(report_parts)
         
-        # Отправляем все сообщения
-        for msg in messages:
-            bot.reply_to(message, msg)
+        # Отправляем все сообщения через очередь, чтобы не превысить лимит Telegram
+        # (файлы и анализ ИИ тоже идут через очередь, чтобы сохранить порядок).
+        # Telegram ограничивает сообщение 4096 символами, поэтому длинный отчет
+        # отправляем одним файлом вместо множества сообщений.
+        if len(report) <= MESSAGE_CHUNK_LIMIT:
+            queue_send(bot.reply_to, message, report)
+        else:
+            summary = (f"{response}Затронуто разделов: {len(findings_with_ids)}. "
+                       f"Отчет слишком длинный для сообщения и отправлен файлом.\n{comment_info}")
+            queue_send(bot.reply_to, message, summary)
+            queue_send(bot.send_document, message.chat.id, io.BytesIO(report.encode('utf-8')),
+                       visible_file_name="report.txt",
+                       caption="Полный отчет о незаполненных ячейках")
             
-        # Отправляем файл, если он был создан
-        if raw_filename:
-            with open(raw_filename, 'rb') as f:
-                bot.send_document(message.chat.id, f, caption="Полный список пустых ячеек в формате JSON")
+        # Отправляем файл, если он был создан (из памяти, без повторного чтения с диска).
+        # Небольшой результат, полностью показанный в сообщениях, отдельным файлом не дублируем.
+        all_cells_shown = all(len(cells) <= max_cells for cells in findings_with_ids.values())
+        if raw_filename and not (all_cells_shown and len(raw_payload) < INLINE_RESULT_MAX_BYTES):
+            queue_send(bot.send_document, message.chat.id, io.BytesIO(raw_payload),
+                       visible_file_name=raw_filename,
+                       caption="Полный список пустых ячеек в формате JSON (сжат gzip)")
                 
         # Отправляем AI анализ, если доступен
         if ai_explanation and len(ai_explanation) > 0:
             # Разбиваем длинный анализ на части, если нужно
-            ai_parts = [ai_explanation[i:i+3900] for i in range(0, len(ai_explanation), 3900)]
+            ai_parts = [ai_explanation[i:i+MESSAGE_CHUNK_LIMIT] for i in range(0, len(ai_explanation), MESSAGE_CHUNK_LIMIT)]
             
             for i, part in enumerate(ai_parts):
                 header = "🧠 Анализ пустых ячеек от ИИ:\n\n" if i == 0 else "🧠 Продолжение анализа:\n\n"
-                bot.send_message(message.chat.id, header + part)
+                queue_send(bot.send_message, message.chat.id, header + part)
     except Exception as e:
-        logger.error(f"Error checking empty cells: {str(e)}")
+        logger.error("Error checking empty cells: %s", e)
         bot.reply_to(message, f"Произошла ошибка при проверке таблицы: {str(e)}")
     finally:
         # Убираем отметку о проверке для этого чата
-        if hasattr(bot, 'checking_chats'):
-            bot.checking_chats.discard(chat_id)
+        with _checking_lock:
+            _checking_chats.pop(chat_id, None)
 
 @bot.message_handler(commands=['help'])
 def help_command(message):
@@ -370,6 +612,7 @@ def help_command(message):
 /start - Начать работу с ботом
 /check - Проверить пустые ячейки в таблице
 /check demo - Проверить пустые ячейки в демо-таблице
+/check fresh - Проверить заново, не используя результат недавней проверки
 /stats - Показать статистику пустых ячеек
 /columns - Показать список всех колонок таблиц
 /comments - Показать все комментарии к находкам
@@ -394,42 +637,85 @@ def help_command(message):
 @bot.message_handler(commands=['stats'])
 def stats_command(message):
     try:
-        # Ищем самый последний файл с результатами
-        files = [f for f in os.listdir(".") if f.startswith("empty_cells_") and f.endswith(".json")]
+        # Загружаем данные самой последней проверки (из кэша, если файл не менялся)
+        data = load_latest_empty_cells()
         
-        if not files:
+        if data is None:
             bot.reply_to(message, "Нет данных о проверках. Используйте /check для запуска проверки.")
             return
         
-        # Сортируем по дате создания
-        latest_file = max(files, key=lambda f: os.path.getctime(f))
-        
-        # Загружаем данные из файла
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         empty_cells = data["empty_cells"]
         timestamp = data.get("timestamp", "Неизвестно")
         
-        # Организуем ячейки по категориям
-        organized_cells = organize_empty_cells(empty_cells)
+        # Используем уже организованные при проверке ячейки (старые файлы их не содержат)
+        organized_cells = data.get("organized") or organize_empty_cells(empty_cells)
         
-        # Формируем статистику
-        response = f"📊 Статистика пустых ячеек (последняя проверка: {timestamp})\n\n"
-        response += f"Всего найдено: {len(empty_cells)} пустых ячеек\n"
-        response += f"Затронуто разделов: {len(organized_cells)}\n\n"
+        # Формируем статистику (строки копим в списке и склеиваем один раз)
+        response = [
+            f"📊 Статистика пустых ячеек (последняя проверка: {timestamp})\n\n",
+            f"Всего найдено: {len(empty_cells)} пустых ячеек\n",
+        ]
+        if "unique_count" in data:
+            response.append(f"Уникальных: {data['unique_count']}\n")
+        response.append(f"Затронуто разделов: {len(organized_cells)}\n\n")
         
         # Добавляем детальную статистику по разделам
-        response += "Разбивка по разделам:\n"
-        for table_id, cells in organized_cells.items():
-            response += f"- {table_id}: {len(cells)} ячеек\n"
+        response.append("Разбивка по разделам:\n")
+        response.extend(f"- {table_id}: {len(cells)} ячеек\n" for table_id, cells in organized_cells.items())
         
-        bot.reply_to(message, response)
+        bot.reply_to(message, "".join(response))
         
     except Exception as e:
-        logger.error(f"Error showing stats: {str(e)}")
+        logger.error("Error showing stats: %s", e)
         bot.reply_to(message, f"Произошла ошибка при получении статистики: {str(e)}")
 
+async def explain_tables_async(empty_cells_data):
+    """
+    Запрашивает у OpenAI объяснение пустых ячеек отдельно для каждой таблицы, параллельно
+    
+    Args:
+        empty_cells_data (dict): Находки, сгруппированные по таблицам
+        
+    Returns:
+        list: Пары (table_id, текст объяснения или исключение)
+    """
+    # Асинхронный клиент привязан к циклу событий, поэтому создается внутри asyncio.run
+    client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    
+    async def explain_table(table_id, cells):
+        # Create a structured prompt for the model
+        prompt = f"Пустые ячейки: {dumps_json_compact({table_id: cells})}\nКакие поля критичны, чем опасны пропуски, что сделать?"
+        async with semaphore:
+            # OpenAI API v1.x requires chat.completions
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "Вы аналитик данных медицинского ухода. Кратко, по-русски."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=OPENAI_MAX_TOKENS,
+            )
+        return response.choices[0].message.content
+    
+    table_ids = list(empty_cells_data)
+    try:
+        results = await asyncio.gather(
+            *(explain_table(table_id, empty_cells_data[table_id]) for table_id in table_ids),
+            return_exceptions=True
+        )
+    finally:
+        await client.close()
+    
+    return list(zip(table_ids, results))
+
+def truncate_findings(empty_cells_data):
+    """Обрезает описания ячеек до AI_CELL_MAX_CHARS символов, чтобы не раздувать промпт"""
+    return {
+        table_id: [{**cell, "description": cell["description"][:AI_CELL_MAX_CHARS]} for cell in cells]
+        for table_id, cells in empty_cells_data.items()
+    }
+
 # Function to generate AI explanations for empty cells
 def get_ai_explanation(empty_cells_data):
     """
@@ -444,29 +730,24 @@ def get_ai_explanation(empty_cells_data):
     if not openai_client:
         return "ИИ не может предоставить объяснение: API ключ OpenAI не настроен или клиент не инициализирован."
     
+    empty_cells_data = truncate_findings(empty_cells_data)
+    
     if not OPENAI_ASSISTANT_ID:
-        # Use completion API instead of Assistant API
+        # Use completion API instead of Assistant API.
+        # Each table is explained by its own request; the requests run concurrently.
         try:
-            # Create a structured prompt for the model
-            prompt = f"""Анализ пустых ячеек в медицинских таблицах:
-\nНайдены следующие пустые ячейки:\n{json.dumps(empty_cells_data, indent=2, ensure_ascii=False)}\n\nПожалуйста, опишите на русском языке, какие проблемы могут возникнуть из-за этих пустых ячеек\nв контексте медицинского ухода и что следует предпринять. Укажите, какие поля наиболее критичны \nдля заполнения и почему. Если есть закономерности в пустых полях, укажите их.\n"""
-            # OpenAI API v1.x requires chat.completions
-            try:
-                response = openai_client.chat.completions.create(
-                    model=OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": "Вы - аналитик данных в системе управления медицинскими данными. Ваша задача - анализировать незаполненные поля в таблицах и объяснять их значимость."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000,
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                logger.error(f"Error using OpenAI chat completions: {e}")
-                return f"Ошибка при получении объяснения от ИИ: {e}"
+            results = asyncio.run(explain_tables_async(empty_cells_data))
         except Exception as e:
-            logger.error(f"Error generating AI explanation: {str(e)}")
+            logger.error("Error generating AI explanation: %s", e)
             return f"Ошибка при получении объяснения от ИИ: {str(e)}"
+        
+        explanations = []
+        for table_id, result in results:
+            if isinstance(result, Exception):
+                logger.error("Error using OpenAI chat completions for %s: %s", table_id, result)
+                result = f"Ошибка при получении объяснения от ИИ: {result}"
+            explanations.append(f"📊 {table_id}:\n{result}")
+        return "\n\n".join(explanations)
     else:
         # Use Assistant API with better error handling
         try:
@@ -480,22 +761,25 @@ def get_ai_explanation(empty_cells_data):
                 openai_client.beta.threads.messages.create(
                     thread_id=thread.id,
                     role="user",
-                    content=f"Проанализируйте следующие пустые ячейки в медицинских таблицах и объясните их значимость: {json.dumps(empty_cells_data, indent=2, ensure_ascii=False)}"
+                    content=f"Проанализируйте следующие пустые ячейки в медицинских таблицах и объясните их значимость: {dumps_json_compact(empty_cells_data)}"
                 )
                 run = openai_client.beta.threads.runs.create(
                     thread_id=thread.id,
                     assistant_id=OPENAI_ASSISTANT_ID
                 )
-                # Wait for the assistant to complete with timeout
-                import time
+                # Wait for the assistant to complete with timeout.
+                # Poll with exponential backoff: short runs finish without a full 1s sleep,
+                # long runs do not waste retrieve requests.
                 max_wait_time = 60  # Maximum wait time in seconds
-                start_time = time.time()
+                poll_delay = ASSISTANT_POLL_INITIAL_DELAY
+                start_time = time.monotonic()
                 while run.status in ["queued", "in_progress"]:
                     # Check timeout
-                    if time.time() - start_time > max_wait_time:
-                        logger.warning(f"Timeout waiting for assistant response after {max_wait_time} seconds")
+                    if time.monotonic() - start_time > max_wait_time:
+                        logger.warning("Timeout waiting for assistant response after %s seconds", max_wait_time)
                         return "Время ожидания ответа от ассистента истекло. Попробуйте позже."
-                    time.sleep(1)
+                    time.sleep(poll_delay)
+                    poll_delay = min(poll_delay * 2, ASSISTANT_POLL_MAX_DELAY)
                     run = openai_client.beta.threads.runs.retrieve(
                         thread_id=thread.id,
                         run_id=run.id
@@ -510,22 +794,26 @@ def get_ai_explanation(empty_cells_data):
                             try:
                                 return message.content[0].text.value
                             except (IndexError, AttributeError) as e:
-                                logger.error(f"Error extracting message content: {e}")
+                                logger.error("Error extracting message content: %s", e)
                                 return "ИИ не смогла сформулировать объяснение в правильном формате."
                     return "ИИ не смогла сформулировать объяснение."
                 else:
                     return f"Ошибка при получении ответа ассистента. Статус: {run.status}"
             except Exception as e:
-                logger.error(f"Error in beta.threads API flow: {e}")
+                logger.error("Error in beta.threads API flow: %s", e)
                 return f"Ошибка в работе API ассистента: {e}"
         except Exception as e:
-            logger.error(f"Error using Assistant API: {e}")
+            logger.error("Error using Assistant API: %s", e)
             return f"Ошибка при использовании API ассистента: {e}"
 
+# Precompiled patterns for finding IDs and column names in cell descriptions
+_FINDING_ID_RE = re.compile(r'#(?P<id>\d+)')
+_COLUMN_NAME_RE = re.compile(r'(?:Колонка|Column) \d+\s*\(([^)]+)\)|\((?:Колонка|Header):\s*([^)]+)\)')
+
 # Function to extract finding ID from a message
 def extract_finding_id(text):
     """Extract finding ID from text using regex"""
-    match = re.search(r'#(?P<id>\d+)', text)
+    match = _FINDING_ID_RE.search(text)
     if match:
         return match.group('id')
     return None
@@ -538,52 +826,69 @@ def handle_comment(message):
     """Handle user comments on findings"""
     finding_id = extract_finding_id(message.reply_to_message.text)
     if finding_id:
-        # Save the comment
-        if 'comments' not in comments_db:
-            comments_db['comments'] = {}
-        
-        comments_db['comments'][finding_id] = {
+        # Append the comment as one line instead of rewriting all comments
+        entry = {
+            'id': finding_id,
             'user_id': message.from_user.id,
             'user_name': message.from_user.username or message.from_user.first_name,
             'comment': message.text,
             'timestamp': datetime.now().isoformat()
         }
         
-        # Save comments to file
-        with open('comments.json', 'w', encoding='utf-8') as f:
-            json.dump(comments_db, f, ensure_ascii=False, indent=2)
+        with open(COMMENTS_FILE, 'ab') as f:
+            f.write(dumps_json_line(entry))
             
         bot.reply_to(message, f"✅ Комментарий к находке #{finding_id} сохранен.")
     else:
         bot.reply_to(message, "❌ Не удалось определить ID находки. Комментарий не сохранен.")
 
+def load_comments():
+    """
+    Загружает комментарии к находкам
+    
+    Returns:
+        dict: finding_id -> последний комментарий к находке
+    """
+    comments = {}
+    
+    if os.path.exists(LEGACY_COMMENTS_FILE):
+        comments.update(read_json_file(LEGACY_COMMENTS_FILE).get('comments', {}))
+    
+    if os.path.exists(COMMENTS_FILE):
+        with open(COMMENTS_FILE, 'rb', buffering=JSON_IO_BUFFER_SIZE) as f:
+            for line in f:
+                if line.strip():
+                    entry = loads_json(line)
+                    comments[entry.pop('id')] = entry
+    
+    return comments
+
 # Handler to view comments
 @bot.message_handler(commands=['comments'])
 def view_comments(message):
     """View all comments for findings"""
-    if not os.path.exists('comments.json'):
+    if not os.path.exists(COMMENTS_FILE) and not os.path.exists(LEGACY_COMMENTS_FILE):
         bot.reply_to(message, "Комментарии к находкам отсутствуют.")
         return
         
     try:
-        with open('comments.json', 'r', encoding='utf-8') as f:
-            comments_data = json.load(f)
+        comments = load_comments()
             
-        if not comments_data.get('comments'):
+        if not comments:
             bot.reply_to(message, "Комментарии к находкам отсутствуют.")
             return
             
-        response = "💬 Комментарии к находкам:\n\n"
+        response = ["💬 Комментарии к находкам:\n\n"]
         
-        for finding_id, comment_info in comments_data.get('comments', {}).items():
-            response += f"📌 Находка #{finding_id}:\n"
-            response += f"  - Комментарий: {comment_info['comment']}\n"
-            response += f"  - От: @{comment_info['user_name']}\n"
-            response += f"  - Время: {datetime.fromisoformat(comment_info['timestamp']).strftime('%d.%m.%Y %H:%M')}\n\n"
+        for finding_id, comment_info in comments.items():
+            response.append(f"📌 Находка #{finding_id}:\n")
+            response.append(f"  - Комментарий: {comment_info['comment']}\n")
+            response.append(f"  - От: @{comment_info['user_name']}\n")
+            response.append(f"  - Время: {datetime.fromisoformat(comment_info['timestamp']).strftime('%d.%m.%Y %H:%M')}\n\n")
             
-        bot.reply_to(message, response)
+        bot.reply_to(message, "".join(response))
     except Exception as e:
-        logger.error(f"Error viewing comments: {str(e)}")
+        logger.error("Error viewing comments: %s", e)
         bot.reply_to(message, f"Ошибка при загрузке комментариев: {str(e)}")
 
 # Command to list all table columns
@@ -591,20 +896,13 @@ def view_comments(message):
 def list_columns(message):
     """List all columns from the last scan"""
     try:
-        # Find the latest results file
-        files = [f for f in os.listdir(".") if f.startswith("empty_cells_") and f.endswith(".json")]
+        # Load data from the latest results file (plain or gzip-compressed)
+        data = load_latest_empty_cells()
         
-        if not files:
+        if data is None:
             bot.reply_to(message, "Нет данных о проверках. Используйте /check для запуска проверки.")
             return
             
-        # Get the latest file
-        latest_file = max(files, key=lambda f: os.path.getctime(f))
-        
-        # Load data
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
         empty_cells = data.get("empty_cells", [])
         
         # Extract all column names
@@ -617,32 +915,26 @@ def list_columns(message):
                 table_id = parts[0].strip()
                 col_info = ','.join(parts[2:]).strip()
                 
-                # Extract column name using regex
-                col_match = re.search(r'Колонка \d+\s*\(([^)]+)\)', col_info) or re.search(r'Column \d+\s*\(([^)]+)\)', col_info)
+                # Extract column name using one combined regex
+                col_match = _COLUMN_NAME_RE.search(col_info)
                 if col_match:
-                    column_names[table_id].add(col_match.group(1))
-                else:
-                    # Try another pattern
-                    col_match = re.search(r'\(Колонка:\s*([^)]+)\)', col_info) or re.search(r'\(Header:\s*([^)]+)\)', col_info)
-                    if col_match:
-                        column_names[table_id].add(col_match.group(1))
+                    column_names[table_id].add(col_match.group(1) or col_match.group(2))
         
         if not column_names:
             bot.reply_to(message, "Не удалось извлечь информацию о колонках из последней проверки.")
             return
             
         # Prepare response
-        response = "📋 Список колонок в таблицах:\n\n"
+        response = ["📋 Список колонок в таблицах:\n\n"]
         
         for table_id, columns in column_names.items():
-            response += f"📊 {table_id}:\n"
-            for i, column in enumerate(sorted(columns), 1):
-                response += f"  {i}. {column}\n"
-            response += "\n"
+            response.append(f"📊 {table_id}:\n")
+            response.extend(f"  {i}. {column}\n" for i, column in enumerate(sorted(columns), 1))
+            response.append("\n")
             
-        bot.reply_to(message, response)
+        bot.reply_to(message, "".join(response))
     except Exception as e:
-        logger.error(f"Error listing columns: {str(e)}")
+        logger.error("Error listing columns: %s", e)
         bot.reply_to(message, f"Ошибка при получении списка колонок: {str(e)}")
 
 @bot.message_handler(commands=['dumpall'])
@@ -651,10 +943,17 @@ def dump_all_cells_command(message):
     try:
         url = REAL_URL if REAL_URL else DEMO_URL
         filename = dump_all_cells(url)
-        with open(filename, 'rb') as f:
-            bot.send_document(message.chat.id, f, caption="Все ячейки всех таблиц с названиями колонок")
+        # Сжимаем выгрузку потоково в память: в Telegram уходит gzip, а не полный JSON
+        compressed = io.BytesIO()
+        with open(filename, 'rb', buffering=JSON_IO_BUFFER_SIZE) as f, \
+                gzip.GzipFile(fileobj=compressed, mode='wb', compresslevel=RESULTS_GZIP_LEVEL) as gz:
+            shutil.copyfileobj(f, gz, JSON_IO_BUFFER_SIZE)
+        compressed.seek(0)
+        bot.send_document(message.chat.id, compressed,
+                          visible_file_name=os.path.basename(filename) + ".gz",
+                          caption="Все ячейки всех таблиц с названиями колонок (сжато gzip)")
     except Exception as e:
-        logger.error(f"Ошибка при выгрузке всех ячеек: {e}")
+        logger.error("Ошибка при выгрузке всех ячеек: %s", e)
         bot.reply_to(message, f"Ошибка при выгрузке всех ячеек: {e}")
 
 @bot.message_handler(commands=['signal'])
@@ -664,7 +963,7 @@ def signal_command(message):
         send_signal_message("Тестовое уведомление из Telegram-бота!")
         bot.reply_to(message, f"Тестовое уведомление отправлено в Signal на {SIGNAL_PHONE}")
     except Exception as e:
-        logger.error(f"Ошибка при отправке уведомления в Signal: {e}")
+        logger.error("Ошибка при отправке уведомления в Signal: %s", e)
         bot.reply_to(message, f"Ошибка при отправке уведомления в Signal: {e}")
 
 # Command to manually clean up data files
@@ -672,10 +971,10 @@ def signal_command(message):
 def cleanup_command(message):
     """Ручная очистка старых файлов данных"""
     try:
-        cleanup.cleanup_now()
-        bot.reply_to(message, "✅ Старые файлы данных удалены")
+        deleted_count = cleanup.cleanup_now()
+        bot.reply_to(message, f"✅ Старые файлы данных удалены (удалено файлов: {deleted_count})")
     except Exception as e:
-        logger.error(f"Ошибка при очистке файлов: {e}")
+        logger.error("Ошибка при очистке файлов: %s", e)
         bot.reply_to(message, f"❌ Ошибка при очистке файлов: {e}")
 
 # Start the bot
@@ -684,7 +983,10 @@ if __name__ == '__main__':
     
     # Запускаем поток автоматической очистки данных
     cleanup_thread = cleanup.start_cleanup_thread()
-    logger.info(f"Автоматическая очистка данных настроена (интервал очистки: {cleanup.CLEANUP_INTERVAL_SECONDS} сек., срок хранения: {cleanup.DATA_RETENTION_MINUTES} мин.)")
+    logger.info("Автоматическая очистка данных настроена (интервал очистки: %s сек., срок хранения: %s мин.)", cleanup.CLEANUP_INTERVAL_SECONDS, cleanup.DATA_RETENTION_MINUTES)
+    
+    # Запускаем поток отправки сообщений из очереди
+    send_thread = start_send_worker()
     
     # Запускаем бота
     bot.infinity_polling()
@@ -6,7 +6,6 @@
 import os
 import threading
 import time
-from datetime import datetime, timedelta
 import logging
 
 # Настройка логирования
@@ -16,77 +15,93 @@ logger = logging.getLogger(__name__)
 DATA_RETENTION_MINUTES = 15  # Время хранения данных в минутах
 CLEANUP_INTERVAL_SECONDS = 300  # Интервал проверки файлов для очистки (5 минут)
 
+# Событие остановки потока очистки и блокировка, чтобы ручная и плановая очистка не шли одновременно
+_STOP_EVENT = threading.Event()
+_SWEEP_LOCK = threading.Lock()
+
 # Файловые шаблоны для очистки
 FILE_PATTERNS = [
     "empty_cells_*.json",
+    "empty_cells_*.json.gz",
+    "empty_cells_*.pkl",
     "findings_*.json",
     "all_cells_*.json"
 ]
 
-def get_file_age_minutes(file_path):
-    """Определяет возраст файла в минутах"""
-    try:
-        file_mtime = os.path.getmtime(file_path)
-        file_datetime = datetime.fromtimestamp(file_mtime)
-        age = datetime.now() - file_datetime
-        return age.total_seconds() / 60
-    except Exception as e:
-        logger.error(f"Ошибка при определении возраста файла {file_path}: {e}")
-        return 0
+# Шаблоны вида "префикс*суффикс" в виде пар (префикс, суффикс) для быстрой проверки имени
+_FILE_PREFIX_SUFFIXES = [tuple(pattern.split("*", 1)) for pattern in FILE_PATTERNS]
 
 def is_data_file(filename):
     """Проверяет, является ли файл файлом данных, подлежащим очистке"""
-    from fnmatch import fnmatch
-    return any(fnmatch(filename, pattern) for pattern in FILE_PATTERNS)
+    return any(
+        len(filename) >= len(prefix) + len(suffix)
+        and filename.startswith(prefix) and filename.endswith(suffix)
+        for prefix, suffix in _FILE_PREFIX_SUFFIXES
+    )
 
 def delete_old_files():
-    """Удаляет старые файлы данных"""
+    """Удаляет старые файлы данных и возвращает количество удаленных файлов"""
+    deleted_count = 0
     try:
-        current_dir = os.getcwd()
-        deleted_count = 0
+        now = time.time()
         
-        for filename in os.listdir(current_dir):
-            if os.path.isfile(filename) and is_data_file(filename):
-                file_path = os.path.join(current_dir, filename)
-                age_minutes = get_file_age_minutes(file_path)
+        # os.scandir возвращает тип и время изменения файла без отдельного stat() для каждого имени
+        with _SWEEP_LOCK, os.scandir(os.getcwd()) as entries:
+            for entry in entries:
+                if not is_data_file(entry.name) or not entry.is_file(follow_symlinks=False):
+                    continue
+                
+                try:
+                    age_minutes = (now - entry.stat().st_mtime) / 60
+                except OSError as e:
+                    logger.error("Ошибка при определении возраста файла %s: %s", entry.name, e)
+                    continue
                 
                 if age_minutes > DATA_RETENTION_MINUTES:
                     try:
-                        os.remove(file_path)
+                        os.remove(entry.path)
                         deleted_count += 1
-                        logger.info(f"Удален устаревший файл данных: {filename} (возраст: {age_minutes:.1f} минут)")
+                        logger.info("Удален устаревший файл данных: %s (возраст: %.1f минут)", entry.name, age_minutes)
                     except Exception as e:
-                        logger.error(f"Ошибка при удалении файла {filename}: {e}")
+                        logger.error("Ошибка при удалении файла %s: %s", entry.name, e)
         
         if deleted_count > 0:
-            logger.info(f"Очистка завершена. Удалено файлов: {deleted_count}")
+            logger.info("Очистка завершена. Удалено файлов: %s", deleted_count)
             
     except Exception as e:
-        logger.error(f"Ошибка при очистке старых файлов: {e}")
+        logger.error("Ошибка при очистке старых файлов: %s", e)
+    
+    return deleted_count
 
 def cleanup_thread():
     """Фоновый поток для периодической очистки старых файлов"""
-    logger.info(f"Запущен поток автоматической очистки данных (интервал: {CLEANUP_INTERVAL_SECONDS} сек., хранение: {DATA_RETENTION_MINUTES} мин.)")
+    logger.info("Запущен поток автоматической очистки данных (интервал: %s сек., хранение: %s мин.)", CLEANUP_INTERVAL_SECONDS, DATA_RETENTION_MINUTES)
     
-    while True:
+    while not _STOP_EVENT.is_set():
         try:
             # Выполняем очистку
             delete_old_files()
-            
-            # Ожидаем до следующего цикла очистки
-            time.sleep(CLEANUP_INTERVAL_SECONDS)
         except Exception as e:
-            logger.error(f"Ошибка в потоке очистки: {e}")
+            logger.error("Ошибка в потоке очистки: %s", e)
             # Даже в случае ошибки продолжаем работу потока
-            time.sleep(CLEANUP_INTERVAL_SECONDS)
+        
+        # Ожидаем до следующего цикла очистки; stop_cleanup_thread() будит поток раньше
+        _STOP_EVENT.wait(CLEANUP_INTERVAL_SECONDS)
 
 def start_cleanup_thread():
     """Запускает фоновый поток очистки данных"""
+    _STOP_EVENT.clear()
     cleanup_thread_obj = threading.Thread(target=cleanup_thread, daemon=True)
     cleanup_thread_obj.start()
     return cleanup_thread_obj
 
+def stop_cleanup_thread():
+    """Останавливает фоновый поток очистки данных, не дожидаясь конца интервала"""
+    _STOP_EVENT.set()
+
 def cleanup_now():
-    """Немедленная очистка старых файлов (может быть вызвана вручную)"""
+    """Немедленная очистка старых файлов (может быть вызвана вручную), возвращает количество удаленных файлов"""
     logger.info("Запущена ручная очистка старых файлов данных...")
-    delete_old_files()
+    # Очистка выполняется в вызывающем потоке; идущая в этот момент плановая очистка
+    # сначала завершается, поэтому к возврату все устаревшие файлы уже удалены
+    return delete_old_files()
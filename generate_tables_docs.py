@@ -7,20 +7,272 @@
 """
 
 import os
+import sys
 import json
+import gzip
+import mmap
+import pickle
 import logging
 import glob
 from datetime import datetime
 from collections import defaultdict, Counter
 import re
 import argparse
+import concurrent.futures
 from scraper import dump_all_cells
 from config import REAL_URL, DEMO_URL
 
+# orjson быстрее стандартного json; если он не установлен, используем json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson позволяет читать большие файлы всех ячеек потоково, по одной таблице
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Настройка логирования
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Регулярные выражения для разбора описаний пустых ячеек и имен файлов истории
+_COLUMN_RE = re.compile(r'Колонка:\s*([^)]+)')
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+# Файлы-указатели бота на последнюю проверку дублируют один из файлов истории
+LATEST_EMPTY_CELLS_FILES = {"empty_cells_latest.json", "empty_cells_latest.json.gz"}
+
+def find_empty_cells_files():
+    """Возвращает список файлов с историей пустых ячеек (обычных и сжатых gzip)"""
+    # Один проход os.scandir с проверкой префикса и суффикса вместо двух glob
+    with os.scandir('.') as entries:
+        return [
+            entry.name for entry in entries
+            if entry.name.startswith("empty_cells_")
+            and entry.name.endswith((".json", ".json.gz"))
+            and entry.name not in LATEST_EMPTY_CELLS_FILES
+            and entry.is_file()
+        ]
+
+# Кэш разобранных файлов истории: путь -> (mtime, список пустых ячеек или None).
+# Имя подпадает под шаблоны cleanup.py, поэтому кэш удаляется вместе с файлами данных.
+EMPTY_CELLS_CACHE_FILE = "empty_cells_cache.pkl"
+
+# Бот записывает ключ "empty_cells" сразу после "timestamp", поэтому его отсутствие
+# в начале файла означает, что это не файл истории пустых ячеек и разбирать его не нужно
+EMPTY_CELLS_PROBE_BYTES = 4096
+
+# С какого количества новых файлов истории разбирать их в нескольких процессах
+PARALLEL_PARSE_MIN_FILES = 8
+
+def loads_json(raw):
+    """Разбирает JSON из байтов, используя orjson, если он установлен"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def load_json_file(file_path):
+    """Читает JSON-файл, в том числе сжатый gzip (*.gz)"""
+    if file_path.endswith('.gz'):
+        with gzip.open(file_path, 'rb') as f:
+            return loads_json(f.read())
+    
+    with open(file_path, 'rb') as f:
+        # orjson умеет разбирать буфер напрямую: отображаем файл в память без копирования
+        if orjson is not None and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return loads_json(f.read())
+
+def read_empty_cells(file_path):
+    """
+    Читает список пустых ячеек из файла истории (вызывается и в дочерних процессах)
+    
+    Returns:
+        tuple: (список пустых ячеек или None, текст ошибки или None)
+    """
+    try:
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rb') as f:
+            # Сначала читаем только начало файла и проверяем наличие ключа
+            head = f.read(EMPTY_CELLS_PROBE_BYTES)
+            if b'"empty_cells"' not in head:
+                return None, None
+            raw = head + f.read()
+        return loads_json(raw).get("empty_cells"), None
+    except Exception as e:
+        return None, str(e)
+
+def read_empty_cells_files(file_paths):
+    """
+    Разбирает файлы истории; если их много, параллельно в пуле процессов
+    
+    Returns:
+        list: Результаты read_empty_cells в порядке file_paths
+    """
+    if len(file_paths) < PARALLEL_PARSE_MIN_FILES:
+        return [read_empty_cells(file_path) for file_path in file_paths]
+    
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        return list(executor.map(read_empty_cells, file_paths, chunksize=8))
+
+def load_empty_cells_files(empty_cells_files):
+    """
+    Загружает списки пустых ячеек из файлов истории, повторно разбирая только новые
+    и измененные файлы (по времени изменения), остальные берутся из кэша
+    
+    Args:
+        empty_cells_files (list): Пути к файлам с историей пустых ячеек
+        
+    Yields:
+        tuple: (путь к файлу, список пустых ячеек или None, если ключа "empty_cells" нет)
+    """
+    try:
+        with open(EMPTY_CELLS_CACHE_FILE, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception:
+        cache = {}
+    
+    # Определяем, какие файлы новые или изменились
+    mtimes = {}
+    to_parse = []
+    for file_path in empty_cells_files:
+        try:
+            mtimes[file_path] = os.path.getmtime(file_path)
+        except OSError as e:
+            logger.error(f"Ошибка при анализе файла {file_path}: {e}")
+            continue
+        cached = cache.get(file_path)
+        if cached is None or cached[0] != mtimes[file_path]:
+            to_parse.append(file_path)
+    
+    parsed = dict(zip(to_parse, read_empty_cells_files(to_parse)))
+    
+    # Записи об удаленных файлах в новый кэш не переносим
+    new_cache = {}
+    changed = bool(to_parse) or len(cache) != len(mtimes)
+    
+    for file_path, mtime in mtimes.items():
+        if file_path in parsed:
+            empty_cells, error = parsed[file_path]
+            if error is not None:
+                logger.error(f"Ошибка при анализе файла {file_path}: {error}")
+                continue
+        else:
+            empty_cells = cache[file_path][1]
+        new_cache[file_path] = (mtime, empty_cells)
+        
+        yield file_path, empty_cells
+    
+    if changed:
+        try:
+            with open(EMPTY_CELLS_CACHE_FILE, 'wb') as f:
+                pickle.dump(new_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кэш файлов истории: {e}")
+
+def iter_json_tables(file_path):
+    """
+    Итерирует таблицы (пары ключ-значение верхнего уровня) из JSON-файла.
+    Если установлен ijson, файл читается потоково и в памяти держится только одна таблица.
+    """
+    if ijson is not None and not file_path.endswith('.gz'):
+        with open(file_path, 'rb') as f:
+            yield from ijson.kvitems(f, '', use_float=True)
+    else:
+        yield from load_json_file(file_path).items()
+
+# Сколько уникальных примеров значений собирать для каждой колонки
+SAMPLES_PER_COLUMN = 3
+
+def analyze_table(table_data):
+    """
+    Определяет колонки таблицы и собирает примеры значений
+    
+    Args:
+        table_data (list | dict): Данные одной таблицы из файла всех ячеек
+        
+    Returns:
+        dict: Колонки и примеры значений или None, если колонки не найдены
+    """
+    if isinstance(table_data, list):
+        # Обработка таблиц в формате списка словарей
+        columns = {}
+        # Примеры храним как ключи словаря: проверка уникальности за O(1), порядок сохраняется
+        column_samples = defaultdict(dict)
+        # Колонки, для которых уже собраны все примеры: дальше их значения не проверяем
+        full_cols = set()
+        
+        for row_data in table_data:
+            if "data" in row_data and isinstance(row_data["data"], dict):
+                for col_name, cell_value in row_data["data"].items():
+                    # Имена колонок повторяются в каждой строке: интернируем, чтобы ключи
+                    # словарей сравнивались по ссылке и хранились в одном экземпляре
+                    col_name = sys.intern(col_name)
+                    if col_name in full_cols:
+                        continue
+                    if col_name not in columns:
+                        columns[col_name] = col_name
+                    
+                    # Собираем примеры значений (до SAMPLES_PER_COLUMN уникальных для каждой колонки);
+                    # null в примеры не попадает, сначала проверяем самое дешевое условие - длину
+                    samples = column_samples[col_name]
+                    if cell_value is None:
+                        continue
+                    cell_value = cell_value.strip() if type(cell_value) is str else str(cell_value)
+                    if len(cell_value) > 1 and cell_value not in samples:
+                        samples[cell_value] = None
+                        if len(samples) == SAMPLES_PER_COLUMN:
+                            full_cols.add(col_name)
+        
+        if columns:  # Добавляем таблицу только если нашли колонки
+            return {
+                "columns": columns,
+                "samples": {col_name: list(samples) for col_name, samples in column_samples.items()}
+            }
+    elif isinstance(table_data, dict):
+        # Обработка таблиц в формате словаря
+        columns = {}
+        column_samples = {}
+        
+        # Извлекаем информацию о колонках
+        for column_id, column_info in table_data.items():
+            if isinstance(column_info, dict) and "header" in column_info:
+                columns[column_id] = column_info["header"]
+                column_samples[column_id] = {}
+        
+        # Собираем примеры значений для всех колонок за один проход по строкам
+        full_cols = set()
+        for row_id, cell_info in table_data.items():
+            if len(full_cols) == len(columns):
+                break
+            if not row_id.startswith("row_") or not isinstance(cell_info, dict):
+                continue
+            
+            for column_id, cell_value in cell_info.items():
+                if column_id in full_cols:
+                    continue
+                cell_values = column_samples.get(column_id)
+                if cell_values is None or cell_value is None:
+                    continue
+                
+                cell_value = cell_value.strip() if type(cell_value) is str else str(cell_value)
+                if len(cell_value) > 1 and cell_value not in cell_values:
+                    cell_values[cell_value] = None
+                    if len(cell_values) == SAMPLES_PER_COLUMN:
+                        full_cols.add(column_id)
+        
+        if columns:  # Добавляем таблицу только если нашли колонки
+            return {
+                "columns": columns,
+                "samples": {column_id: list(cell_values) for column_id, cell_values in column_samples.items()}
+            }
+    
+    return None
+
 def analyze_all_cells(data_file):
     """
     Анализирует файл с данными всех ячеек и создает структурированное описание таблиц.
@@ -33,119 +285,103 @@ def analyze_all_cells(data_file):
     """
     logger.info(f"Анализируем данные из файла: {data_file}")
     
+    tables_structure = {}
+    
     try:
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Анализируем таблицы и их колонки
+        for table_name, table_data in iter_json_tables(data_file):
+            table_structure = analyze_table(table_data)
+            if table_structure:
+                tables_structure[table_name] = table_structure
     except Exception as e:
         logger.error(f"Ошибка при чтении файла: {e}")
         return None
-
-    tables_structure = {}
-    
-    # Анализируем таблицы и их колонки
-    for table_name, table_data in data.items():
-        if isinstance(table_data, list):
-            # Обработка таблиц в формате списка словарей
-            columns = {}
-            column_samples = defaultdict(list)
-            
-            for row_data in table_data:
-                if "data" in row_data and isinstance(row_data["data"], dict):
-                    for col_name, cell_value in row_data["data"].items():
-                        if col_name not in columns:
-                            columns[col_name] = col_name
-                        
-                        # Собираем примеры значений (до 3 уникальных для каждой колонки)
-                        cell_value = cell_value.strip() if isinstance(cell_value, str) else str(cell_value)
-                        if (cell_value and len(cell_value) > 1 and 
-                            len(column_samples[col_name]) < 3 and 
-                            cell_value not in column_samples[col_name]):
-                            column_samples[col_name].append(cell_value)
-            
-            if columns:  # Добавляем таблицу только если нашли колонки
-                tables_structure[table_name] = {
-                    "columns": columns,
-                    "samples": dict(column_samples)
-                }
-        elif isinstance(table_data, dict):
-            # Обработка таблиц в формате словаря
-            columns = {}
-            column_samples = {}
-            
-            # Извлекаем информацию о колонках
-            for column_id, column_info in table_data.items():
-                if isinstance(column_info, dict) and "header" in column_info:
-                    header = column_info["header"]
-                    columns[column_id] = header
-                    
-                    # Собираем примеры значений для каждой колонки
-                    cell_values = []
-                    for row_id, cell_info in table_data.items():
-                        if row_id.startswith("row_") and isinstance(cell_info, dict) and column_id in cell_info:
-                            cell_value = cell_info[column_id].strip() if isinstance(cell_info[column_id], str) else str(cell_info[column_id])
-                            if cell_value and len(cell_value) > 1 and len(cell_values) < 3 and cell_value not in cell_values:
-                                cell_values.append(cell_value)
-                                
-                    column_samples[column_id] = cell_values
-            
-            if columns:  # Добавляем таблицу только если нашли колонки
-                tables_structure[table_name] = {
-                    "columns": columns,
-                    "samples": column_samples
-                }
     
     return tables_structure
 
-def analyze_empty_cells_patterns():
+def analyze_empty_cells(empty_cells_files=None):
     """
-    Анализирует файлы с пустыми ячейками для выявления общих паттернов
+    Анализирует файлы с пустыми ячейками за один проход: собирает и паттерны
+    для документации, и общую статистику
     
+    Args:
+        empty_cells_files (list, optional): Файлы для анализа (по умолчанию - все файлы истории)
+        
     Returns:
-        dict: Структурированная информация о часто встречающихся пустых ячейках
+        tuple: (паттерны пустых ячеек, статистика по пустым ячейкам); пустые словари, если файлов нет
     """
-    logger.info("Анализируем историю пустых ячеек...")
-    empty_cells_files = glob.glob("empty_cells_*.json")
+    if empty_cells_files is None:
+        empty_cells_files = find_empty_cells_files()
     
     if not empty_cells_files:
         logger.warning("Не найдено файлов с историей пустых ячеек")
-        return {}
+        return {}, {}
     
-    # Счетчики для различных паттернов
+    # В цикле считаем только таблицы и пары (таблица, колонка);
+    # счетчики по колонкам выводятся из пар после прохода
     table_counters = Counter()
-    column_counters = defaultdict(Counter)
     table_column_pairs = Counter()
     
+    stats = {
+        "total_files": len(empty_cells_files),
+        "total_empty_cells": 0,
+        "recent_date": None,
+        "oldest_date": None
+    }
+    
     # Анализ всех файлов с пустыми ячейками
-    for file_path in empty_cells_files:
+    for file_path, empty_cells in load_empty_cells_files(sorted(empty_cells_files)):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            if "empty_cells" not in data:
+            # Извлекаем дату из имени файла
+            date_match = _DATE_RE.search(file_path)
+            if date_match:
+                date_str = date_match.group(1)
+                if stats["recent_date"] is None or date_str > stats["recent_date"]:
+                    stats["recent_date"] = date_str
+                if stats["oldest_date"] is None or date_str < stats["oldest_date"]:
+                    stats["oldest_date"] = date_str
+            
+            if empty_cells is None:
                 continue
                 
-            for cell_desc in data["empty_cells"]:
+            stats["total_empty_cells"] += len(empty_cells)
+            
+            # Ключи копим по файлу и передаем счетчикам одним вызовом Counter.update
+            tables = []
+            pairs = []
+            for cell_desc in empty_cells:
                 # Попытка извлечь имя таблицы
-                parts = cell_desc.split(',', 1)
-                if len(parts) < 2:
+                head, sep, rest_info = cell_desc.partition(',')
+                if not sep:
                     continue
                     
-                table_name = parts[0].strip()
-                rest_info = parts[1].strip()
+                # rest_info не обрезаем: по нему выполняется только поиск колонки
+                table_name = sys.intern(head.strip())
                 
                 # Учитываем встречаемость таблиц
-                table_counters[table_name] += 1
+                tables.append(table_name)
                 
                 # Пытаемся извлечь имя колонки
-                column_match = re.search(r'Колонка:\s*([^)]+)', rest_info)
+                column_match = _COLUMN_RE.search(rest_info)
                 if column_match:
-                    column_name = column_match.group(1).strip()
-                    column_counters[table_name][column_name] += 1
-                    table_column_pairs[(table_name, column_name)] += 1
+                    column_name = sys.intern(column_match.group(1).strip())
+                    pairs.append((table_name, column_name))
+            
+            table_counters.update(tables)
+            table_column_pairs.update(pairs)
         
         except Exception as e:
             logger.error(f"Ошибка при анализе файла {file_path}: {e}")
     
+    column_counters = defaultdict(Counter)
+    stats["tables"] = Counter(table_counters)
+    stats["columns"] = Counter()
+    stats["table_column_pairs"] = Counter()
+    for (table_name, column_name), count in table_column_pairs.items():
+        column_counters[table_name][column_name] = count
+        stats["columns"][column_name] += count
+        stats["table_column_pairs"][f"{table_name}:{column_name}"] = count
+    
     # Формируем структурированные данные о часто встречающихся пустых ячейках
     empty_cells_patterns = {
         "common_tables": [{"table": table, "count": count} 
@@ -157,47 +393,80 @@ def analyze_empty_cells_patterns():
                                      for (table, column), count in table_column_pairs.most_common(15)]
     }
     
-    return empty_cells_patterns
+    return empty_cells_patterns, stats
+
+def analyze_empty_cells_patterns():
+    """
+    Анализирует файлы с пустыми ячейками для выявления общих паттернов
+    
+    Returns:
+        dict: Структурированная информация о часто встречающихся пустых ячейках
+    """
+    logger.info("Анализируем историю пустых ячеек...")
+    return analyze_empty_cells()[0]
+
+# Неизменные блоки документации (строки, которые склеиваются через "\n")
+_DOC_INTRO = (
+    "## Введение",
+    "\nЭтот документ содержит информацию о структуре таблиц в медицинской системе MeinPflegedienst. "
+    "Он предназначен для лучшего понимания контекста данных при анализе незаполненных ячеек.\n",
+    "Система работает с сайтом https://app.meinpflegedienst.com/ и содержит "
+    "данные о пациентах, медицинском персонале, назначениях и процедурах.\n",
+    "## Общая информация",
+    "\nСистема содержит несколько таблиц, каждая из которых хранит различные аспекты "
+    "данных о пациентах, их медицинском обслуживании, лечении и другой связанной информации.\n",
+    "### Основные категории таблиц:",
+    "\n- **Пациенты** - информация о пациентах, их личные данные",
+    "\n- **Персонал** - информация о медицинском персонале",
+    "\n- **Назначения** - информация о назначенных процедурах и лечении",
+    "\n- **Расписание** - информация о запланированных встречах и посещениях",
+    "\n- **Документы** - информация о медицинской документации\n",
+)
+
+_DOC_EMPTY_CELLS_HEADER = (
+    "## Часто встречающиеся пустые ячейки",
+    "\nНа основе анализа исторических данных, следующие таблицы и колонки "
+    "чаще всего содержат незаполненные данные:\n",
+)
+
+_DOC_RECOMMENDATIONS = (
+    "## Рекомендации по анализу пустых ячеек",
+    "\nПри анализе пустых ячеек рекомендуется обратить внимание на следующие аспекты:\n",
+    "\n1. **Критичность информации** - насколько критична отсутствующая информация для лечения пациента.",
+    "\n2. **Нормативные требования** - какие поля должны быть заполнены согласно медицинским стандартам.",
+    "\n3. **Потенциальные риски** - какие риски возникают при отсутствии информации в конкретных полях.",
+    "\n4. **Приоритет заполнения** - какие поля следует заполнить в первую очередь.",
+    "\n5. **Возможные причины** - почему информация может отсутствовать (технические проблемы, человеческий фактор).\n",
+)
 
-def generate_documentation(tables_structure):
+def generate_documentation(tables_structure, empty_cells_patterns=None, now=None):
     """
     Создает документацию на основе структуры таблиц и анализа пустых ячеек
     
     Args:
         tables_structure (dict): Структурированное описание таблиц
+        empty_cells_patterns (dict, optional): Уже посчитанные паттерны пустых ячеек
+            (см. analyze_empty_cells); если не переданы, файлы истории анализируются заново
+        now (datetime, optional): Дата создания документации (по умолчанию - текущее время)
         
     Returns:
         str: Текст документации в формате Markdown
     """
+    if now is None:
+        now = datetime.now()
+    
     doc = []
     doc.append("# Документация о структуре таблиц медицинской системы MeinPflegedienst")
-    doc.append(f"\nДата создания: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n")
-    
-    doc.append("## Введение")
-    doc.append("\nЭтот документ содержит информацию о структуре таблиц в медицинской системе MeinPflegedienst. " +
-              "Он предназначен для лучшего понимания контекста данных при анализе незаполненных ячеек.\n")
-    
-    doc.append("Система работает с сайтом https://app.meinpflegedienst.com/ и содержит " +
-              "данные о пациентах, медицинском персонале, назначениях и процедурах.\n")
+    doc.append(f"\nДата создания: {now.strftime('%d.%m.%Y %H:%M')}\n")
     
-    doc.append("## Общая информация")
-    doc.append("\nСистема содержит несколько таблиц, каждая из которых хранит различные аспекты " +
-              "данных о пациентах, их медицинском обслуживании, лечении и другой связанной информации.\n")
-    
-    doc.append("### Основные категории таблиц:")
-    doc.append("\n- **Пациенты** - информация о пациентах, их личные данные")
-    doc.append("\n- **Персонал** - информация о медицинском персонале")
-    doc.append("\n- **Назначения** - информация о назначенных процедурах и лечении")
-    doc.append("\n- **Расписание** - информация о запланированных встречах и посещениях")
-    doc.append("\n- **Документы** - информация о медицинской документации\n")
+    doc.extend(_DOC_INTRO)
     
     # Анализ паттернов пустых ячеек
-    empty_cells_patterns = analyze_empty_cells_patterns()
+    if empty_cells_patterns is None:
+        empty_cells_patterns = analyze_empty_cells_patterns()
     
     if empty_cells_patterns:
-        doc.append("## Часто встречающиеся пустые ячейки")
-        doc.append("\nНа основе анализа исторических данных, следующие таблицы и колонки " +
-                  "чаще всего содержат незаполненные данные:\n")
+        doc.extend(_DOC_EMPTY_CELLS_HEADER)
         
         # Наиболее частые таблицы с пустыми ячейками
         if empty_cells_patterns.get("common_tables"):
@@ -251,27 +520,172 @@ def generate_documentation(tables_structure):
                         doc.append("\n**Важность:** " + importance)
                     
                     # Добавляем примеры значений
-                    if column_id in samples and samples[column_id]:
+                    if samples.get(column_id):
                         doc.append("\nПримеры значений:")
-                        for sample in samples[column_id]:
-                            sample_text = sample
-                            if len(sample_text) > 100:  # Ограничиваем длину длинных примеров
-                                sample_text = sample_text[:100] + "..."
-                            doc.append(f"- {sample_text}")
+                        # Ограничиваем длину длинных примеров
+                        doc.extend(f"- {sample[:100]}..." if len(sample) > 100 else f"- {sample}"
+                                   for sample in samples[column_id])
                     
                     doc.append("")  # Пустая строка для разделения
     
     # Добавляем рекомендации для анализа пустых ячеек
-    doc.append("## Рекомендации по анализу пустых ячеек")
-    doc.append("\nПри анализе пустых ячеек рекомендуется обратить внимание на следующие аспекты:\n")
-    doc.append("\n1. **Критичность информации** - насколько критична отсутствующая информация для лечения пациента.")
-    doc.append("\n2. **Нормативные требования** - какие поля должны быть заполнены согласно медицинским стандартам.")
-    doc.append("\n3. **Потенциальные риски** - какие риски возникают при отсутствии информации в конкретных полях.")
-    doc.append("\n4. **Приоритет заполнения** - какие поля следует заполнить в первую очередь.")
-    doc.append("\n5. **Возможные причины** - почему информация может отсутствовать (технические проблемы, человеческий фактор).\n")
+    doc.extend(_DOC_RECOMMENDATIONS)
     
     return "\n".join(doc)
 
+# Важность полей по ключевым словам в названии: критически важные поля
+CRITICAL_FIELDS = {
+    "diagnose": "Критически важная информация для лечения. Отсутствие диагноза может привести к неправильному лечению.",
+    "allergien": "Критически важная информация о наличии аллергических реакций. Отсутствие может угрожать жизни пациента.",
+    "medikament": "Критически важная информация о назначенных лекарствах. Влияет на лечение и возможные взаимодействия.",
+    "dosis": "Критически важная информация о дозировке лекарств. Неправильная дозировка может навредить пациенту."
+}
+
+# Очень важные поля
+IMPORTANT_FIELDS = {
+    "geburtsdatum": "Важная информация для идентификации пациента и расчета возрастных особенностей лечения.",
+    "name": "Важная информация для идентификации пациента или сотрудника.",
+    "vorname": "Важная информация для идентификации пациента или сотрудника.",
+    "nachname": "Важная информация для идентификации пациента или сотрудника.",
+    "versicherung": "Важная информация для оплаты услуг и документооборота.",
+    "termin": "Важная информация для планирования работы персонала и обслуживания пациентов."
+}
+
+# Стандартные поля
+STANDARD_FIELDS = {
+    "telefon": "Стандартная контактная информация. Важна для связи с пациентом или его представителями.",
+    "email": "Стандартная контактная информация.",
+    "adresse": "Стандартная информация о месте проживания. Может быть важна для планирования выездов.",
+    "bemerkung": "Дополнительная информация, которая может содержать важные детали.",
+    "notiz": "Дополнительная информация, которая может содержать важные детали."
+}
+
+# Все ключевые слова важности в порядке проверки, с готовым текстом описания
+FIELD_IMPORTANCE = {
+    **{word: "Критически важное поле. " + desc for word, desc in CRITICAL_FIELDS.items()},
+    **{word: "Очень важное поле. " + desc for word, desc in IMPORTANT_FIELDS.items()},
+    **{word: "Стандартное поле. " + desc for word, desc in STANDARD_FIELDS.items()}
+}
+
+# Словарь с описаниями распространенных типов таблиц
+TABLE_TYPE_DESCRIPTIONS = {
+    "patient": "о пациентах, их личной и контактной информации",
+    "patientdata": "о пациентах, включая их личные данные и медицинскую информацию",
+    "pflege": "о медицинском уходе и лечебных процедурах",
+    "pfleger": "о медицинском персонале и ухаживающих",
+    "mitarbeiter": "о сотрудниках медицинского учреждения",
+    "termin": "о назначенных визитах, встречах и процедурах",
+    "termine": "о назначенных визитах, встречах и процедурах",
+    "medikament": "о лекарственных препаратах и их применении",
+    "medikamente": "о лекарственных препаратах и их применении",
+    "behandlung": "о методах лечения и терапии",
+    "diagnose": "о диагнозах пациентов",
+    "anamnese": "об анамнезе пациентов",
+    "personal": "о персонале медицинского учреждения",
+    "dokument": "о документах и медицинской документации",
+    "schein": "о медицинских направлениях и рецептах",
+    "kontakt": "о контактах и связанных лицах",
+    "date": "о датах и временных метках событий",
+    "geburtstage": "о днях рождения пациентов или персонала",
+    "uebersicht": "обзорная информация о различных аспектах работы",
+    "grid": "табличные данные о различных аспектах работы",
+    "gridview": "представление данных в табличном формате",
+    "treeview": "иерархически организованные данные"
+}
+
+# Словарь с описаниями распространенных типов колонок
+COLUMN_DESCRIPTIONS = {
+    "name": "Имя пациента или сотрудника",
+    "vorname": "Имя пациента или сотрудника",
+    "nachname": "Фамилия пациента или сотрудника",
+    "geburtsdatum": "Дата рождения пациента или сотрудника",
+    "geburtstag": "Дата рождения пациента или сотрудника",
+    "adresse": "Адрес проживания",
+    "straße": "Улица проживания",
+    "plz": "Почтовый индекс",
+    "ort": "Населенный пункт",
+    "telefon": "Контактный телефон",
+    "tel": "Контактный телефон",
+    "handy": "Мобильный телефон",
+    "email": "Адрес электронной почты",
+    "versicherung": "Информация о страховке",
+    "versicherungsnummer": "Номер страхового полиса",
+    "krankenkasse": "Медицинская страховая компания",
+    "diagnose": "Поставленный диагноз",
+    "medikament": "Назначенное лекарство или препарат",
+    "dosis": "Дозировка препарата",
+    "datum": "Дата события или записи",
+    "uhrzeit": "Время события или записи",
+    "anmerkung": "Дополнительные примечания или комментарии",
+    "status": "Статус записи или процедуры",
+    "id": "Уникальный идентификатор записи",
+    "patient": "Идентификатор или ссылка на пациента",
+    "arzt": "Врач, ответственный за лечение или назначение",
+    "pfleger": "Медицинский работник, осуществляющий уход",
+    "service": "Тип услуги или сервиса",
+    "leistung": "Оказанная услуга или процедура",
+    "kosten": "Стоимость услуги или процедуры",
+    "bemerkung": "Замечания или комментарии",
+    "notiz": "Заметки или примечания",
+    "geschlecht": "Пол пациента или сотрудника",
+    "alter": "Возраст пациента или сотрудника",
+    "jahre": "Количество лет (возраст)",
+    "bereich": "Область или отделение",
+    "abteilung": "Отдел или подразделение",
+    "termin": "Запланированная встреча, визит или процедура",
+    "zeit": "Время события",
+    "von": "Время начала",
+    "bis": "Время окончания",
+    "duration": "Продолжительность",
+    "dauer": "Продолжительность",
+    "art": "Тип или категория",
+    "typ": "Тип или категория",
+    "kategorie": "Категория",
+    "mitarbeiter": "Сотрудник, ответственный за процедуру или запись"
+}
+
+# Контекстно-зависимые описания
+COLUMN_CONTEXT_DESCRIPTIONS = {
+    # Колонки в контексте таблиц о пациентах
+    ("name", "patient"): "Полное имя пациента",
+    ("alter", "patient"): "Возраст пациента в годах",
+    ("geschlecht", "patient"): "Пол пациента",
+    
+    # Колонки в контексте таблиц о персонале
+    ("name", "personal"): "Полное имя сотрудника",
+    ("name", "mitarbeiter"): "Полное имя сотрудника",
+    ("name", "pfleger"): "Полное имя медицинского работника",
+    
+    # Колонки в контексте таблиц о встречах/визитах
+    ("datum", "termin"): "Дата назначенного визита или процедуры",
+    ("zeit", "termin"): "Время назначенного визита или процедуры",
+    
+    # Колонки в контексте таблиц о днях рождения
+    ("name", "geburtstag"): "Имя человека, у которого день рождения",
+    ("datum", "geburtstag"): "Дата дня рождения",
+    ("alter", "geburtstag"): "Исполняющийся возраст",
+    ("jahre", "geburtstag"): "Исполняющееся количество лет"
+}
+
+
+def _keyword_regex(keywords):
+    """
+    Компилирует регулярное выражение, которое за один проход находит ключевые слова
+    во всех позициях строки. Альтернативы идут в порядке словаря, поэтому в каждой
+    позиции находится слово, стоящее в словаре раньше других.
+    """
+    return re.compile('(?=(' + '|'.join(map(re.escape, keywords)) + '))')
+
+def _first_keyword(keyword_re, keyword_order, text):
+    """Возвращает ключевое слово, которое встречается в text и стоит в словаре раньше всех, или None"""
+    matches = keyword_re.findall(text)
+    return min(matches, key=keyword_order.__getitem__) if matches else None
+
+_FIELD_IMPORTANCE_RE = _keyword_regex(FIELD_IMPORTANCE)
+_FIELD_IMPORTANCE_ORDER = {word: i for i, word in enumerate(FIELD_IMPORTANCE)}
+_COLUMN_DESCRIPTIONS_RE = _keyword_regex(COLUMN_DESCRIPTIONS)
+_COLUMN_DESCRIPTIONS_ORDER = {key: i for i, key in enumerate(COLUMN_DESCRIPTIONS)}
+
 def get_field_importance(field_name):
     """
     Определяет важность поля на основе его названия
@@ -282,49 +696,9 @@ def get_field_importance(field_name):
     Returns:
         str: Описание важности или None, если невозможно определить
     """
-    field_name_lower = field_name.lower()
-    
-    # Критически важные поля
-    critical_fields = {
-        "diagnose": "Критически важная информация для лечения. Отсутствие диагноза может привести к неправильному лечению.",
-        "allergien": "Критически важная информация о наличии аллергических реакций. Отсутствие может угрожать жизни пациента.",
-        "medikament": "Критически важная информация о назначенных лекарствах. Влияет на лечение и возможные взаимодействия.",
-        "dosis": "Критически важная информация о дозировке лекарств. Неправильная дозировка может навредить пациенту."
-    }
-    
-    # Очень важные поля
-    important_fields = {
-        "geburtsdatum": "Важная информация для идентификации пациента и расчета возрастных особенностей лечения.",
-        "name": "Важная информация для идентификации пациента или сотрудника.",
-        "vorname": "Важная информация для идентификации пациента или сотрудника.",
-        "nachname": "Важная информация для идентификации пациента или сотрудника.",
-        "versicherung": "Важная информация для оплаты услуг и документооборота.",
-        "termin": "Важная информация для планирования работы персонала и обслуживания пациентов."
-    }
-    
-    # Стандартные поля
-    standard_fields = {
-        "telefon": "Стандартная контактная информация. Важна для связи с пациентом или его представителями.",
-        "email": "Стандартная контактная информация.",
-        "adresse": "Стандартная информация о месте проживания. Может быть важна для планирования выездов.",
-        "bemerkung": "Дополнительная информация, которая может содержать важные детали.",
-        "notiz": "Дополнительная информация, которая может содержать важные детали."
-    }
-    
-    # Проверяем соответствие
-    for word, desc in critical_fields.items():
-        if word in field_name_lower:
-            return "Критически важное поле. " + desc
-            
-    for word, desc in important_fields.items():
-        if word in field_name_lower:
-            return "Очень важное поле. " + desc
-            
-    for word, desc in standard_fields.items():
-        if word in field_name_lower:
-            return "Стандартное поле. " + desc
-            
-    return None
+    # Проверяем соответствие (критичные, затем важные, затем стандартные поля)
+    word = _first_keyword(_FIELD_IMPORTANCE_RE, _FIELD_IMPORTANCE_ORDER, field_name.lower())
+    return FIELD_IMPORTANCE[word] if word else None
 
 def generate_table_description(table_name):
     """
@@ -336,37 +710,11 @@ def generate_table_description(table_name):
     Returns:
         str: Описание таблицы
     """
-    # Словарь с описаниями распространенных типов таблиц
-    descriptions = {
-        "patient": "о пациентах, их личной и контактной информации",
-        "patientdata": "о пациентах, включая их личные данные и медицинскую информацию",
-        "pflege": "о медицинском уходе и лечебных процедурах",
-        "pfleger": "о медицинском персонале и ухаживающих",
-        "mitarbeiter": "о сотрудниках медицинского учреждения",
-        "termin": "о назначенных визитах, встречах и процедурах",
-        "termine": "о назначенных визитах, встречах и процедурах",
-        "medikament": "о лекарственных препаратах и их применении",
-        "medikamente": "о лекарственных препаратах и их применении",
-        "behandlung": "о методах лечения и терапии",
-        "diagnose": "о диагнозах пациентов",
-        "anamnese": "об анамнезе пациентов",
-        "personal": "о персонале медицинского учреждения",
-        "dokument": "о документах и медицинской документации",
-        "schein": "о медицинских направлениях и рецептах",
-        "kontakt": "о контактах и связанных лицах",
-        "date": "о датах и временных метках событий",
-        "geburtstage": "о днях рождения пациентов или персонала",
-        "uebersicht": "обзорная информация о различных аспектах работы",
-        "grid": "табличные данные о различных аспектах работы",
-        "gridview": "представление данных в табличном формате",
-        "treeview": "иерархически организованные данные"
-    }
-    
     table_name_lower = table_name.lower()
     
     # Находим наиболее подходящее описание
     matched_descriptions = []
-    for key, desc in descriptions.items():
+    for key, desc in TABLE_TYPE_DESCRIPTIONS.items():
         if key in table_name_lower:
             matched_descriptions.append(desc)
     
@@ -399,89 +747,15 @@ def generate_column_description(header, table_name):
     header_lower = header.lower()
     table_name_lower = table_name.lower()
     
-    # Словарь с описаниями распространенных типов колонок
-    descriptions = {
-        "name": "Имя пациента или сотрудника",
-        "vorname": "Имя пациента или сотрудника",
-        "nachname": "Фамилия пациента или сотрудника",
-        "geburtsdatum": "Дата рождения пациента или сотрудника",
-        "geburtstag": "Дата рождения пациента или сотрудника",
-        "adresse": "Адрес проживания",
-        "straße": "Улица проживания",
-        "plz": "Почтовый индекс",
-        "ort": "Населенный пункт",
-        "telefon": "Контактный телефон",
-        "tel": "Контактный телефон",
-        "handy": "Мобильный телефон",
-        "email": "Адрес электронной почты",
-        "versicherung": "Информация о страховке",
-        "versicherungsnummer": "Номер страхового полиса",
-        "krankenkasse": "Медицинская страховая компания",
-        "diagnose": "Поставленный диагноз",
-        "medikament": "Назначенное лекарство или препарат",
-        "dosis": "Дозировка препарата",
-        "datum": "Дата события или записи",
-        "uhrzeit": "Время события или записи",
-        "anmerkung": "Дополнительные примечания или комментарии",
-        "status": "Статус записи или процедуры",
-        "id": "Уникальный идентификатор записи",
-        "patient": "Идентификатор или ссылка на пациента",
-        "arzt": "Врач, ответственный за лечение или назначение",
-        "pfleger": "Медицинский работник, осуществляющий уход",
-        "service": "Тип услуги или сервиса",
-        "leistung": "Оказанная услуга или процедура",
-        "kosten": "Стоимость услуги или процедуры",
-        "bemerkung": "Замечания или комментарии",
-        "notiz": "Заметки или примечания",
-        "geschlecht": "Пол пациента или сотрудника",
-        "alter": "Возраст пациента или сотрудника",
-        "jahre": "Количество лет (возраст)",
-        "bereich": "Область или отделение",
-        "abteilung": "Отдел или подразделение",
-        "termin": "Запланированная встреча, визит или процедура",
-        "zeit": "Время события",
-        "von": "Время начала",
-        "bis": "Время окончания",
-        "duration": "Продолжительность",
-        "dauer": "Продолжительность",
-        "art": "Тип или категория",
-        "typ": "Тип или категория",
-        "kategorie": "Категория",
-        "mitarbeiter": "Сотрудник, ответственный за процедуру или запись"
-    }
-    
-    # Контекстно-зависимые описания
-    context_descriptions = {
-        # Колонки в контексте таблиц о пациентах
-        ("name", "patient"): "Полное имя пациента",
-        ("alter", "patient"): "Возраст пациента в годах",
-        ("geschlecht", "patient"): "Пол пациента",
-        
-        # Колонки в контексте таблиц о персонале
-        ("name", "personal"): "Полное имя сотрудника",
-        ("name", "mitarbeiter"): "Полное имя сотрудника",
-        ("name", "pfleger"): "Полное имя медицинского работника",
-        
-        # Колонки в контексте таблиц о встречах/визитах
-        ("datum", "termin"): "Дата назначенного визита или процедуры",
-        ("zeit", "termin"): "Время назначенного визита или процедуры",
-        
-        # Колонки в контексте таблиц о днях рождения
-        ("name", "geburtstag"): "Имя человека, у которого день рождения",
-        ("datum", "geburtstag"): "Дата дня рождения",
-        ("alter", "geburtstag"): "Исполняющийся возраст",
-        ("jahre", "geburtstag"): "Исполняющееся количество лет"
-    }
-    
     # Проверяем контекстные описания
-    for (col, context), desc in context_descriptions.items():
+    for (col, context), desc in COLUMN_CONTEXT_DESCRIPTIONS.items():
         if col in header_lower and context in table_name_lower:
             return desc
     
     # Находим наиболее подходящее описание
-    for key, desc in descriptions.items():
-        if key in header_lower:
-            return desc
+    key = _first_keyword(_COLUMN_DESCRIPTIONS_RE, _COLUMN_DESCRIPTIONS_ORDER, header_lower)
+    if key:
+        return COLUMN_DESCRIPTIONS[key]
     
     # Если не нашли подходящего описания, возвращаем более умное общее описание
     if "mp-uebersicht-termine" in table_name_lower:
@@ -495,22 +769,25 @@ def generate_column_description(header, table_name):
     
     return f"Данные, относящиеся к полю '{header}' в таблице {table_name}"
 
-def create_documentation_file(tables_structure, output_file=None, empty_cells_data=None):
+def create_documentation_file(tables_structure, output_file=None, empty_cells_patterns=None):
     """
     Создает файл документации на основе структуры таблиц
     
     Args:
         tables_structure (dict): Структурированное описание таблиц
         output_file (str, optional): Путь для сохранения файла документации
-        empty_cells_data (dict, optional): Дополнительные данные о пустых ячейках
+        empty_cells_patterns (dict, optional): Уже посчитанные паттерны пустых ячеек
+            (если не переданы, generate_documentation анализирует файлы истории сама)
         
     Returns:
         str: Путь к созданному файлу документации
     """
+    # Одно и то же время для имени файла и даты внутри документации
+    now = datetime.now()
     if output_file is None:
-        output_file = f"table_documentation_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.md"
+        output_file = f"table_documentation_{now.strftime('%Y-%m-%d_%H-%M-%S')}.md"
     
-    doc_content = generate_documentation(tables_structure)
+    doc_content = generate_documentation(tables_structure, empty_cells_patterns, now=now)
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(doc_content)
@@ -525,62 +802,7 @@ def analyze_empty_cells_files():
     Returns:
         dict: Статистика по пустым ячейкам
     """
-    empty_cells_files = glob.glob("empty_cells_*.json")
-    if not empty_cells_files:
-        logger.warning("Не найдено файлов с данными о пустых ячейках")
-        return {}
-    
-    stats = {
-        "total_files": len(empty_cells_files),
-        "total_empty_cells": 0,
-        "tables": defaultdict(int),
-        "columns": defaultdict(int),
-        "table_column_pairs": defaultdict(int),
-        "recent_date": None,
-        "oldest_date": None
-    }
-    
-    for file_path in sorted(empty_cells_files):
-        try:
-            # Извлекаем дату из имени файла
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2})', file_path)
-            if date_match:
-                date_str = date_match.group(1)
-                if stats["recent_date"] is None or date_str > stats["recent_date"]:
-                    stats["recent_date"] = date_str
-                if stats["oldest_date"] is None or date_str < stats["oldest_date"]:
-                    stats["oldest_date"] = date_str
-            
-            # Читаем содержимое файла
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            if "empty_cells" not in data:
-                continue
-                
-            stats["total_empty_cells"] += len(data["empty_cells"])
-            
-            # Анализируем каждую пустую ячейку
-            for cell_desc in data["empty_cells"]:
-                parts = cell_desc.split(',', 1)
-                if len(parts) < 2:
-                    continue
-                    
-                table_name = parts[0].strip()
-                rest_info = parts[1].strip()
-                
-                stats["tables"][table_name] += 1
-                
-                # Извлекаем название колонки, если есть
-                column_match = re.search(r'Колонка:\s*([^)]+)', rest_info)
-                if column_match:
-                    column_name = column_match.group(1).strip()
-                    stats["columns"][column_name] += 1
-                    stats["table_column_pairs"][f"{table_name}:{column_name}"] += 1
-        except Exception as e:
-            logger.error(f"Ошибка при анализе файла {file_path}: {e}")
-    
-    return stats
+    return analyze_empty_cells()[1]
 
 def main():
     """
@@ -622,14 +844,14 @@ def main():
     
     # Если структура получена успешно, создаем документацию
     if tables_structure:
-        # Анализируем пустые ячейки, если нужно
-        empty_cells_data = None
+        # Анализируем пустые ячейки, если нужно (паттерны сразу передаем в документацию)
+        empty_cells_patterns = None
         if args.empty_cells:
-            empty_cells_data = analyze_empty_cells_files()
+            empty_cells_patterns, empty_cells_data = analyze_empty_cells()
             logger.info(f"Проанализировано {empty_cells_data.get('total_files', 0)} файлов с данными о пустых ячейках")
         
         # Создаем документацию
-        doc_file = create_documentation_file(tables_structure, args.output, empty_cells_data)
+        doc_file = create_documentation_file(tables_structure, args.output, empty_cells_patterns)
         
         print("\n" + "=" * 70)
         print(f"Документация успешно создана и сохранена в файл:")
@@ -644,11 +866,11 @@ def main():
         
         # Если включен режим анализа пустых ячеек, хотя бы его используем
         if args.empty_cells:
-            empty_cells_data = analyze_empty_cells_files()
+            empty_cells_patterns, empty_cells_data = analyze_empty_cells()
             logger.info(f"Проанализировано {empty_cells_data.get('total_files', 0)} файлов с данными о пустых ячейках")
             
             # Создаем минимальную документацию только с анализом пустых ячеек
-            doc_file = create_documentation_file({}, args.output, empty_cells_data)
+            doc_file = create_documentation_file({}, args.output, empty_cells_patterns)
             
             print("\n" + "=" * 70)
             print(f"Создана частичная документация (только анализ пустых ячеек):")
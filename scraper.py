@@ -1,5 +1,4 @@
 import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -9,10 +8,244 @@ from selenium.webdriver.support import expected_conditions as EC
 import time
 import logging
 import os
+import asyncio
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 logger = logging.getLogger(__name__)
 
+# Optional JSON endpoint the ExtJS grid store loads its records from (store.proxy.url),
+# set via the SCRAPER_DATA_ENDPOINT environment variable. For the page given in
+# SCRAPER_DATA_PAGE_URL empty cells are read with a plain HTTP request and no browser
+# is started; every other URL is still scraped with Selenium.
+SCRAPER_HTTP_TIMEOUT = 30
+
+_http_session = requests.Session()
+
+# Validators (ETag, Last-Modified) and result of the last endpoint response, so unchanged
+# data is revalidated with a conditional request instead of being downloaded and parsed again
+_endpoint_cache = {}
+
+def get_empty_cells_from_endpoint(endpoint, table_id="JSON"):
+    """
+    Fetch the grid records from a JSON endpoint and return a list of empty cells
+    
+    Args:
+        endpoint (str): URL of the JSON data source behind the grid
+        table_id (str): Table name used in the cell descriptions
+        
+    Returns:
+        list: List of strings describing empty cells, in the same format as the Selenium path
+    """
+    cache_key = (endpoint, table_id)
+    cached = _endpoint_cache.get(cache_key)
+    
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    
+    response = _http_session.get(endpoint, headers=headers, timeout=SCRAPER_HTTP_TIMEOUT)
+    if cached and response.status_code == 304:
+        logger.info("Endpoint data not modified, reusing the previous result")
+        return list(cached[2])
+    response.raise_for_status()
+    payload = response.json()
+    
+    # ExtJS stores usually wrap the records in a "data" property
+    records = payload.get("data", []) if isinstance(payload, dict) else payload
+    
+    empty_cells = []
+    for row_idx, record in enumerate(records):
+        if not isinstance(record, dict):
+            continue
+        
+        values = list(record.items())
+        # First field usually identifies the row (patient ID or name)
+        row_identifier = str(values[0][1]).strip() if values and values[0][1] is not None else ""
+        row_id_text = f" (ID: {row_identifier})" if row_identifier else ""
+        
+        for col_idx, (column, value) in enumerate(values):
+            if value is None or (isinstance(value, str) and not value.strip()):
+                empty_cells.append(f"{table_id}, Строка {row_idx+1}{row_id_text}, Колонка {col_idx+1} (Колонка: {column})")
+    
+    logger.info(f"Found {len(empty_cells)} empty cells in {len(records)} records from endpoint")
+    
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        _endpoint_cache[cache_key] = (etag, last_modified, list(empty_cells))
+    return empty_cells
+
+# Warm Chrome instances are kept between scrapes: starting Chrome costs several seconds
+# per call. Drivers are recycled after DRIVER_MAX_USES pages to keep memory in check.
+DRIVER_POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', '2'))
+DRIVER_MAX_USES = 20
+
+_driver_pool = queue.Queue()
+_driver_lock = threading.Lock()
+_driver_uses = {}
+
+def create_driver():
+    """Start a new Chrome WebDriver with the scraper options"""
+    chrome_options = Options()
+
+    # Check if running in Docker or if SELENIUM_HEADLESS is set
+    if os.environ.get('SELENIUM_HEADLESS', '').lower() == 'true':
+        chrome_options.add_argument("--headless=new")
+        logger.info("Running Chrome in headless mode")
+
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-gpu")
+
+    # Only the table text is needed: skip images and return from get() on DOMContentLoaded,
+    # the grid itself is awaited explicitly. Stylesheets stay on because innerText depends on layout.
+    chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.page_load_strategy = 'eager'
+
+    return webdriver.Chrome(options=chrome_options)
+
+def _take_driver():
+    """Take an idle driver from the pool, starting a new one while the pool is not full"""
+    while True:
+        try:
+            driver = _driver_pool.get_nowait()
+        except queue.Empty:
+            with _driver_lock:
+                if len(_driver_uses) < DRIVER_POOL_SIZE:
+                    driver = create_driver()
+                    _driver_uses[driver] = 0
+                    return driver
+            driver = _driver_pool.get()
+
+        # None marks a slot freed by a retired driver
+        if driver is not None:
+            return driver
+
+def _retire_driver(driver):
+    """Quit a driver and free its slot in the pool"""
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.warning(f"Error quitting driver: {str(e)}")
+    with _driver_lock:
+        _driver_uses.pop(driver, None)
+    _driver_pool.put(None)
+
+def _release_driver(driver, broken=False):
+    """Return a driver to the pool, or retire it if it failed or is worn out"""
+    with _driver_lock:
+        _driver_uses[driver] = _driver_uses.get(driver, 0) + 1
+        worn_out = _driver_uses[driver] >= DRIVER_MAX_USES
+
+    if broken or worn_out:
+        _retire_driver(driver)
+        return
+
+    try:
+        # Reset session state so the next scrape starts from a clean page
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+    except Exception as e:
+        logger.warning(f"Driver reset failed, retiring it: {str(e)}")
+        _retire_driver(driver)
+        return
+
+    _driver_pool.put(driver)
+
+@contextmanager
+def acquire_driver():
+    """Context manager that lends a pooled Chrome driver for one scrape"""
+    driver = _take_driver()
+    broken = False
+    try:
+        yield driver
+    except Exception:
+        broken = True
+        raise
+    finally:
+        _release_driver(driver, broken)
+
+@atexit.register
+def shutdown_driver_pool():
+    """Quit all pooled drivers"""
+    with _driver_lock:
+        drivers = list(_driver_uses)
+        _driver_uses.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+# Upper bound for waiting until the grid rows are rendered
+GRID_WAIT_TIMEOUT = 15
+GRID_READY_SELECTOR = "div.x-grid-item, table tr"
+
+def wait_for_grid(driver, timeout=GRID_WAIT_TIMEOUT):
+    """
+    Wait until ExtJS grid rows or table rows appear on the page
+    
+    Returns:
+        bool: True if rows appeared, False if the timeout expired
+    """
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, GRID_READY_SELECTOR))
+        )
+        return True
+    except TimeoutException:
+        logger.warning(f"No grid rows appeared within {timeout} seconds, continuing with the current page")
+        return False
+
+# Scripts that snapshot whole tables and grids in one WebDriver round-trip.
+# Each takes a CSS selector as arguments[0] and looks the elements up in the page itself,
+# so Selenium is only needed to load the page; cell texts are trimmed innerText.
+TABLES_JS = """
+const texts = nodes => Array.from(nodes, node => node.innerText.trim());
+return Array.from(document.querySelectorAll(arguments[0]), table => ({
+    id: table.id,
+    headers: texts(table.querySelectorAll('th')),
+    rows: Array.from(table.querySelectorAll('tr'), row => ({
+        th: texts(row.querySelectorAll('th')),
+        td: texts(row.querySelectorAll('td'))
+    }))
+}));
+"""
+
+EXTJS_GRIDS_JS = """
+const texts = nodes => Array.from(nodes, node => node.innerText.trim());
+return Array.from(document.querySelectorAll(arguments[0]), grid => {
+    const cells = Array.from(grid.querySelectorAll('div.x-grid-cell'));
+    const rows = Array.from(grid.querySelectorAll('div.x-grid-item'));
+    const rowCells = rows.map(row => Array.from(row.querySelectorAll('div.x-grid-cell')));
+    // Map each cell to its row's record index once instead of walking up from every cell
+    const recordIndex = new Map();
+    rows.forEach((row, i) => rowCells[i].forEach(cell => recordIndex.set(cell, row.getAttribute('data-recordindex'))));
+    return {
+        id: grid.id,
+        column_headers: texts(grid.querySelectorAll('div.x-column-header')),
+        header_texts: texts(grid.querySelectorAll('span.x-column-header-text')),
+        rows: rowCells.map(texts),
+        cells: cells.map(cell => ({
+            text: cell.innerText.trim(),
+            column: cell.getAttribute('data-columnid'),
+            record: recordIndex.get(cell) ?? null
+        })),
+        contents: cells.length ? [] : texts(grid.querySelectorAll('div.x-grid-cell-inner'))
+    };
+});
+"""
+
 def get_empty_cells(url="https://app.meinpflegedienst.com/mp/?demo=X#uebersicht"):
     """
     Scrape the table from the website and return a list of empty cells
@@ -23,153 +256,165 @@ def get_empty_cells(url="https://app.meinpflegedienst.com/mp/?demo=X#uebersicht"
     Returns:
         list: List of strings describing empty cells found on the page
     """
+    # Environment is read per call: the bot loads .env after importing this module
+    endpoint = os.environ.get('SCRAPER_DATA_ENDPOINT')
+    if endpoint and url == os.environ.get('SCRAPER_DATA_PAGE_URL'):
+        logger.info(f"Fetching grid data for {url} from endpoint: {endpoint}")
+        return get_empty_cells_from_endpoint(endpoint, os.environ.get('SCRAPER_DATA_TABLE', 'JSON'))
+    
     try:
-        # Setup browser options
-        chrome_options = Options()
-        
-        # Check if running in Docker or if SELENIUM_HEADLESS is set
-        if os.environ.get('SELENIUM_HEADLESS', '').lower() == 'true':
-            chrome_options.add_argument("--headless=new")
-            logger.info("Running Chrome in headless mode")
-            
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-gpu")
-        
-        # Create driver with appropriate service
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Load the page
-        logger.info(f"Loading URL: {url}")
-        driver.get(url)
-        
-        # ExtJS takes longer to load - wait more time
-        logger.info("Waiting for the page to load...")
+        with acquire_driver() as driver:
+            return _scrape_one(url, driver)
+    
+    except Exception as e:
+        logger.error(f"Error in get_empty_cells: {str(e)}")
+        raise e
+
+def _scrape_one(url, driver):
+    """Load the page in the given driver and collect its empty cells"""
+    # Load the page
+    logger.info(f"Loading URL: {url}")
+    driver.get(url)
+
+    # ExtJS takes longer to load - wait more time
+    logger.info("Waiting for the page to load...")
+
+    try:
+        # First wait for basic page structure
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+    
+        # ExtJS renders the grid rows asynchronously after the page loads
+        wait_for_grid(driver)
+    
+        # Debug captures transfer megabytes per call, so they are only made with SCRAPER_DEBUG=true
+        debug = os.environ.get('SCRAPER_DEBUG', '').lower() == 'true'
         
-        try:
-            # First wait for basic page structure
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # ExtJS often uses divs with specific classes for tables
-            # Need to wait longer for dynamic content
-            time.sleep(10)
-            
-            # Take screenshot for debugging
+        # Take screenshot for debugging
+        if debug:
             driver.save_screenshot("page_loaded.png")
-            
-            # Log page title for verification
-            logger.info(f"Page Title: {driver.title}")
-            
-            # Try different selectors that might contain table data in ExtJS
-            selectors = [
-                "table", 
-                "div.x-grid-item-container", 
-                "div.x-grid", 
-                "div.x-panel-body",
-                "div.x-grid-view"
-            ]
-            
-            empty_cells = []
-            
-            for selector in selectors:
-                try:
-                    logger.info(f"Trying selector: {selector}")
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    
-                    if elements:
-                        logger.info(f"Found {len(elements)} elements with selector {selector}")
-                        
-                        # Process tables
-                        if selector == "table":
-                            empty_cells.extend(process_standard_tables(driver, elements))
-                        # Process ExtJS grid structures
-                        else:
-                            empty_cells.extend(process_extjs_grids(driver, elements, selector))
+    
+        # Log page title for verification
+        logger.info(f"Page Title: {driver.title}")
+    
+        # Try different selectors that might contain table data in ExtJS.
+        # They are ordered by expected hit rate and the ExtJS ones overlap (a grid view contains
+        # the item container, a panel body contains the grid), so the first selector
+        # that yields empty cells is used and the rest are skipped.
+        selectors = [
+            "table", 
+            "div.x-grid-view",
+            "div.x-grid-item-container", 
+            "div.x-grid", 
+            "div.x-panel-body"
+        ]
+    
+        empty_cells = []
+    
+        for selector in selectors:
+            try:
+                logger.info(f"Trying selector: {selector}")
                 
-                except Exception as e:
-                    logger.error(f"Error processing selector {selector}: {str(e)}")
-            
-            # If no empty cells found, try to get all page content for analysis
-            if not empty_cells:
-                logger.info("No empty cells found through selectors, getting page content")
-                body_text = driver.find_element(By.TAG_NAME, "body").text
-                empty_cells.append(f"No empty cells identified. Page uses ExtJS framework which requires custom selectors. Page content length: {len(body_text)} characters")
+                # Process tables
+                if selector == "table":
+                    results = process_standard_tables(driver, selector)
+                # Process ExtJS grid structures
+                else:
+                    results = process_extjs_grids(driver, selector)
                 
-                # Add information about the structure
+                if results:
+                    # Nested matches of the same selector can report a cell twice
+                    empty_cells = list(dict.fromkeys(results))
+                    break
+        
+            except Exception as e:
+                logger.error(f"Error processing selector {selector}: {str(e)}")
+    
+        # If no empty cells found, try to get all page content for analysis
+        if not empty_cells:
+            logger.info("No empty cells found through selectors, getting page content")
+            body_text = driver.find_element(By.TAG_NAME, "body").text
+            empty_cells.append(f"No empty cells identified. Page uses ExtJS framework which requires custom selectors. Page content length: {len(body_text)} characters")
+        
+            # Add information about the structure
+            if debug:
                 html_structure = driver.page_source
                 logger.info(f"HTML structure length: {len(html_structure)}")
-            
-            driver.quit()
-            return empty_cells
+    
+        return empty_cells
+
+    except TimeoutException:
+        logger.error("Timeout waiting for page elements to load")
+        driver.save_screenshot("timeout_error.png")
+        return ["Error: Page took too long to load. The site might be using complex JavaScript that requires authentication."]
+
+async def get_empty_cells_batch(urls, max_concurrency=5):
+    """
+    Scrape several pages concurrently
+    
+    Args:
+        urls (list): URLs of the pages to analyze
+        max_concurrency (int): Maximum number of pages scraped at the same time
         
-        except TimeoutException:
-            logger.error("Timeout waiting for page elements to load")
-            driver.save_screenshot("timeout_error.png")
-            driver.quit()
-            return ["Error: Page took too long to load. The site might be using complex JavaScript that requires authentication."]
+    Returns:
+        list: One list of empty cell descriptions per URL, in the order of urls
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    except Exception as e:
-        logger.error(f"Error in get_empty_cells: {str(e)}")
-        if 'driver' in locals():
-            driver.quit()
-        raise e
+    async def worker(url):
+        async with semaphore:
+            # Each thread borrows a warm driver from the pool
+            return await asyncio.to_thread(get_empty_cells, url)
+    
+    return await asyncio.gather(*(worker(url) for url in urls))
 
-def process_standard_tables(driver, tables):
+def process_standard_tables(driver, selector="table"):
     """Process standard HTML tables"""
     empty_cells = []
     
-    for table_idx, table in enumerate(tables):
+    # Read all tables in one script call instead of one WebDriver request per cell
+    try:
+        snapshots = driver.execute_script(TABLES_JS, selector)
+    except Exception as e:
+        logger.error(f"Error extracting tables: {str(e)}")
+        return empty_cells
+    
+    if snapshots:
+        logger.info(f"Found {len(snapshots)} elements with selector {selector}")
+    
+    for table_idx, table in enumerate(snapshots):
         try:
-            rows = table.find_elements(By.TAG_NAME, "tr")
+            rows = table["rows"]
             
             # Get table identifier if possible
-            table_id = table.get_attribute("id") or f"Table {table_idx+1}"
+            table_id = table["id"] or f"Table {table_idx+1}"
             
-            # Extract all headers for better context
-            all_headers = []
-            try:
-                headers_row = table.find_elements(By.TAG_NAME, "th")
-                if headers_row:
-                    for header in headers_row:
-                        all_headers.append(header.text.strip())
-                elif len(rows) > 0:
-                    # Try to use first row as header if no TH elements
-                    first_row = rows[0]
-                    header_cells = first_row.find_elements(By.TAG_NAME, "td")
-                    for header_cell in header_cells:
-                        all_headers.append(header_cell.text.strip())
-                        
-                logger.info(f"Found headers for table {table_id}: {all_headers}")
-            except Exception as e:
-                logger.error(f"Error extracting headers for table {table_id}: {str(e)}")
+            # Extract all headers for better context, using the first row if there are no TH elements
+            all_headers = table["headers"] or (rows[0]["td"] if rows else [])
+            logger.info(f"Found headers for table {table_id}: {all_headers}")
+            
+            # Fallback header labels are built once per table, not per empty cell
+            fallback_headers = get_header_info(table)
             
             # Process each row, starting with the second row if the first was used for headers
             start_row = 1 if len(all_headers) > 0 and len(rows) > 0 else 0
             
             for row_idx, row in enumerate(rows[start_row:], start=start_row):
-                # Try to find a row identifier (usually first cell or cells with specific classes)
-                row_identifier = None
-                try:
-                    cells = row.find_elements(By.TAG_NAME, "td")
-                    if cells and len(cells) > 0:
-                        row_identifier = cells[0].text.strip()
-                except:
-                    pass
+                cells = row["td"]
                 
+                # Use the first cell as row identifier (usually patient ID or name)
+                row_identifier = cells[0] if cells else None
                 row_id_text = f" (ID: {row_identifier})" if row_identifier else ""
                 
-                for cell_idx, cell in enumerate(cells):
-                    if not cell.text.strip():
+                for cell_idx, cell_text in enumerate(cells):
+                    if not cell_text:
                         # Empty cell found
                         # Get header info if possible
-                        header_info = ""
-                        if all_headers and cell_idx < len(all_headers) and all_headers[cell_idx]:
+                        if cell_idx < len(all_headers) and all_headers[cell_idx]:
                             header_info = f" (Колонка: {all_headers[cell_idx]})"
                         else:
-                            header_info = get_header_info(table, row_idx, cell_idx)
+                            header_info = fallback_headers[cell_idx] if cell_idx < len(fallback_headers) else ""
                             
                         empty_cells.append(f"{table_id}, Строка {row_idx+1}{row_id_text}, Колонка {cell_idx+1}{header_info}")
         except Exception as e:
@@ -177,140 +422,108 @@ def process_standard_tables(driver, tables):
     
     return empty_cells
 
-def process_extjs_grids(driver, elements, selector):
+def process_extjs_grids(driver, selector):
     """Process ExtJS grid structures which are more complex"""
     empty_cells = []
     
-    for idx, element in enumerate(elements):
+    # Read all grids in one script call instead of one WebDriver request per cell
+    try:
+        grids = driver.execute_script(EXTJS_GRIDS_JS, selector)
+    except Exception as e:
+        logger.error(f"Error extracting ExtJS grids: {str(e)}")
+        return empty_cells
+    
+    if grids:
+        logger.info(f"Found {len(grids)} elements with selector {selector}")
+    
+    for idx, grid in enumerate(grids):
         try:
             # Try to get a meaningful identifier
-            element_id = element.get_attribute("id") or f"{selector.replace('div.', '')} {idx+1}"
+            element_id = grid["id"] or f"{selector.replace('div.', '')} {idx+1}"
             
             # Log the identified element
             logger.info(f"Processing ExtJS grid: {element_id}")
             
             # ExtJS often uses div.x-grid-cell for cells
-            cells = element.find_elements(By.CSS_SELECTOR, "div.x-grid-cell")
+            cells = grid["cells"]
+            rows = grid["rows"]
             
             # Try to get table headers for more context using multiple methods
-            header_texts = {}
-            all_headers = []
+            header_texts = []
             
             # Method 1: Standard ExtJS header cells
-            try:
-                headers = element.find_elements(By.CSS_SELECTOR, "div.x-column-header")
-                for i, header in enumerate(headers):
-                    header_text = header.text.strip()
-                    header_texts[i] = header_text
-                    all_headers.append(header_text)
-                logger.info(f"Found {len(headers)} headers using method 1")
-            except Exception as e:
-                logger.warning(f"Error finding headers with method 1: {str(e)}")
+            if grid["column_headers"]:
+                header_texts = grid["column_headers"]
+                logger.info(f"Found {len(header_texts)} headers using method 1")
             
             # Method 2: Header text spans
-            if not header_texts:
-                try:
-                    headers = element.find_elements(By.CSS_SELECTOR, "span.x-column-header-text")
-                    for i, header in enumerate(headers):
-                        header_text = header.text.strip()
-                        header_texts[i] = header_text
-                        all_headers.append(header_text)
-                    logger.info(f"Found {len(headers)} headers using method 2")
-                except Exception as e:
-                    logger.warning(f"Error finding headers with method 2: {str(e)}")
+            elif grid["header_texts"]:
+                header_texts = grid["header_texts"]
+                logger.info(f"Found {len(header_texts)} headers using method 2")
             
             # Method 3: Try to get header from the first row's cell contents
-            if not header_texts:
-                try:
-                    # Get all rows
-                    rows = element.find_elements(By.CSS_SELECTOR, "div.x-grid-item")
-                    if rows:
-                        # Get cells in first row
-                        first_row_cells = rows[0].find_elements(By.CSS_SELECTOR, "div.x-grid-cell")
-                        for i, cell in enumerate(first_row_cells):
-                            header_text = cell.text.strip()
-                            if header_text:  # Only add non-empty cells
-                                header_texts[i] = header_text
-                                all_headers.append(header_text)
-                        logger.info(f"Found {len(header_texts)} potential headers from first row")
-                except Exception as e:
-                    logger.warning(f"Error finding headers from first row: {str(e)}")
+            elif rows and any(rows[0]):
+                # Keep column positions, empty cells just have no header text
+                header_texts = rows[0]
+                logger.info(f"Found {sum(1 for text in header_texts if text)} potential headers from first row")
             
             # Log found headers
             if header_texts:
                 logger.info(f"Headers for {element_id}: {header_texts}")
             
             if cells:
-                # Create a structure to track row identifiers
-                row_identifiers = {}
+                # Row identifiers (patient ID or name) are usually in the first column
+                row_identifiers = {i: row_cells[0] for i, row_cells in enumerate(rows) if row_cells}
                 
-                # Try to extract row IDs from all rows first (usually in first column)
-                try:
-                    rows = element.find_elements(By.CSS_SELECTOR, "div.x-grid-item")
-                    for i, row in enumerate(rows):
-                        # Try to find a patient ID or name in the row
-                        patient_cells = row.find_elements(By.CSS_SELECTOR, "div.x-grid-cell")
-                        if patient_cells:
-                            # Assume first cell might contain patient ID/name
-                            row_identifiers[i] = patient_cells[0].text.strip()
-                except Exception as e:
-                    logger.warning(f"Error extracting row identifiers: {str(e)}")
+                # Row and column labels are shared by many empty cells, so each is built once
+                row_labels = {}
+                column_labels = {}
+                row_cells_count = len(header_texts) if header_texts else 1
                 
                 # Process each cell
                 for cell_idx, cell in enumerate(cells):
-                    if not cell.text.strip():
-                        # Try to get row and column information
-                        row_info = "unknown"
-                        col_info = "unknown"
-                        row_number = 0
-                        
+                    if not cell["text"]:
+                        # Try to get row information
                         # ExtJS often has data-recordindex for rows
-                        try:
-                            row_parent = cell.find_element(By.XPATH, "./ancestor::div[contains(@class, 'x-grid-item')]")
-                            if row_parent:
-                                row_record_index = row_parent.get_attribute("data-recordindex")
-                                if row_record_index:
+                        row_record_index = cell["record"]
+                        row_info = row_labels.get(row_record_index)
+                        if row_info is None:
+                            row_info = "unknown"
+                            if row_record_index:
+                                try:
                                     row_number = int(row_record_index)
                                     row_info = row_record_index
                                     
                                     # Add row identifier if available
-                                    if row_number in row_identifiers and row_identifiers[row_number]:
+                                    if row_identifiers.get(row_number):
                                         row_info += f" (Пациент: {row_identifiers[row_number]})"
-                        except Exception as e:
-                            logger.warning(f"Error getting row info: {str(e)}")
+                                except ValueError as e:
+                                    logger.warning(f"Error getting row info: {str(e)}")
+                            row_labels[row_record_index] = row_info
                         
                         # Get column information
-                        try:
-                            col_id = cell.get_attribute("data-columnid")
-                            if col_id:
-                                col_info = col_id
-                            else:
-                                # Calculate column index within its row
-                                try:
-                                    row_cells_count = len(header_texts) if header_texts else 1
-                                    col_index = cell_idx % row_cells_count
-                                    col_info = f"Колонка {col_index + 1}"
-                                    
-                                    # Add header text if available
-                                    if header_texts and col_index in header_texts:
-                                        col_info += f" ({header_texts[col_index]})"
-                                except:
-                                    col_info = f"Колонка {cell_idx + 1}"
-                        except Exception as e:
-                            logger.warning(f"Error getting column info: {str(e)}")
-                            col_info = f"Колонка {cell_idx + 1}"
+                        col_info = cell["column"]
+                        if not col_info:
+                            # Calculate column index within its row
+                            col_index = cell_idx % row_cells_count
+                            col_info = column_labels.get(col_index)
+                            if col_info is None:
+                                col_info = f"Колонка {col_index + 1}"
+                                
+                                # Add header text if available
+                                if header_texts and header_texts[col_index]:
+                                    col_info += f" ({header_texts[col_index]})"
+                                column_labels[col_index] = col_info
                         
                         empty_cells.append(f"{element_id}, Строка {row_info}, {col_info} (Пустая ячейка)")
             else:
                 # No cells found, try looking for content containers
-                content_divs = element.find_elements(By.CSS_SELECTOR, "div.x-grid-cell-inner")
-                
-                for div_idx, div in enumerate(content_divs):
-                    if not div.text.strip():
+                for div_idx, div_text in enumerate(grid["contents"]):
+                    if not div_text:
                         column_info = ""
                         if header_texts:
-                            col_index = div_idx % len(header_texts) if len(header_texts) > 0 else 0
-                            if col_index in header_texts:
+                            col_index = div_idx % len(header_texts)
+                            if header_texts[col_index]:
                                 column_info = f" (Колонка: {header_texts[col_index]})"
                         
                         empty_cells.append(f"{element_id}, Запись {div_idx+1}{column_info} (Пустая ячейка)")
@@ -320,29 +533,20 @@ def process_extjs_grids(driver, elements, selector):
     
     return empty_cells
 
-def get_header_info(table, row_idx, cell_idx):
-    """Attempt to get header information for context"""
-    try:
-        # Try to get column header
-        headers = table.find_elements(By.TAG_NAME, "th")
-        
-        if headers and cell_idx < len(headers):
-            header_text = headers[cell_idx].text.strip()
-            if header_text:
-                return f"(Header: {header_text})"
-        
-        # Alternative: try to find headers in first row
-        first_row = table.find_elements(By.TAG_NAME, "tr")[0]
-        if first_row:
-            headers = first_row.find_elements(By.TAG_NAME, "td")
-            if headers and cell_idx < len(headers):
-                header_text = headers[cell_idx].text.strip()
-                if header_text:
-                    return f"(Header: {header_text})"
-        
-        return ""
-    except Exception:
-        return ""
+def get_header_info(table):
+    """Build header labels for context for every column of an extracted table"""
+    headers = table["headers"]
+    first_row = table["rows"][0]["td"] if table["rows"] else []
+    
+    labels = []
+    for cell_idx in range(max(len(headers), len(first_row))):
+        # Try to get column header, alternatively use the first row
+        header_text = headers[cell_idx] if cell_idx < len(headers) else ""
+        if not header_text and cell_idx < len(first_row):
+            header_text = first_row[cell_idx]
+        labels.append(f"(Header: {header_text})" if header_text else "")
+    
+    return labels
 
 def dump_all_cells(url="https://app.meinpflegedienst.com/mp/?demo=X#uebersicht", filename=None):
     """
@@ -356,51 +560,39 @@ def dump_all_cells(url="https://app.meinpflegedienst.com/mp/?demo=X#uebersicht",
         ...
     }
     """
-    from selenium.webdriver.common.by import By
     import json
-    import time
-    import os
     
-    chrome_options = Options()
-    if os.environ.get('SELENIUM_HEADLESS', '').lower() == 'true':
-        chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-gpu")
-    driver = webdriver.Chrome(options=chrome_options)
-    driver.get(url)
-    time.sleep(10)
-    
-    tables = driver.find_elements(By.TAG_NAME, "table")
-    all_tables = {}
-    for table_idx, table in enumerate(tables):
-        table_id = table.get_attribute("id") or f"Table {table_idx+1}"
-        rows = table.find_elements(By.TAG_NAME, "tr")
-        # Получаем заголовки
-        headers = []
-        header_cells = []
-        if rows:
-            ths = rows[0].find_elements(By.TAG_NAME, "th")
-            if ths:
-                header_cells = ths
-            else:
-                header_cells = rows[0].find_elements(By.TAG_NAME, "td")
-            headers = [cell.text.strip() for cell in header_cells]
-        # Сохраняем строки
-        table_data = []
-        for row_idx, row in enumerate(rows[1:], start=1):
-            cells = row.find_elements(By.TAG_NAME, "td")
-            row_data = {}
-            for col_idx, cell in enumerate(cells):
-                col_name = headers[col_idx] if col_idx < len(headers) else f"Column {col_idx+1}"
-                row_data[col_name] = cell.text.strip()
-            table_data.append({"row": row_idx, "data": row_data})
-        all_tables[table_id] = table_data
-    driver.quit()
-    # Сохраняем в файл
+    with acquire_driver() as driver:
+        driver.get(url)
+        wait_for_grid(driver)
+        
+        tables = driver.execute_script(TABLES_JS, "table")
+    
     if not filename:
         filename = f"all_cells_{int(time.time())}.json"
+    
+    # Пишем JSON по таблицам и строкам, не собирая весь словарь в памяти
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(all_tables, f, ensure_ascii=False, indent=2)
+        f.write("{")
+        for table_idx, table in enumerate(tables):
+            table_id = table["id"] or f"Table {table_idx+1}"
+            rows = table["rows"]
+            # Получаем заголовки
+            headers = []
+            if rows:
+                headers = rows[0]["th"] or rows[0]["td"]
+            if table_idx:
+                f.write(",")
+            f.write(f"\n  {json.dumps(table_id, ensure_ascii=False)}: [")
+            # Сохраняем строки
+            for row_idx, row in enumerate(rows[1:], start=1):
+                row_data = {}
+                for col_idx, cell_text in enumerate(row["td"]):
+                    col_name = headers[col_idx] if col_idx < len(headers) else f"Column {col_idx+1}"
+                    row_data[col_name] = cell_text
+                if row_idx > 1:
+                    f.write(",")
+                f.write("\n    " + json.dumps({"row": row_idx, "data": row_data}, ensure_ascii=False))
+            f.write("\n  ]")
+        f.write("\n}\n")
     return filename
\ No newline at end of file
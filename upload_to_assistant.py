@@ -10,8 +10,12 @@ import sys
 import logging
 import argparse
 import json
+import stat
+import hashlib
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
+import httpx
 import openai
 
 # Загружаем переменные окружения
@@ -27,110 +31,358 @@ logger = logging.getLogger(__name__)
 # Получаем API ключ OpenAI и ID ассистента из переменных окружения
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_ASSISTANT_ID = os.getenv('OPENAI_ASSISTANT_ID')
+# Векторное хранилище ассистента (file_search); используется, если его поддерживает установленный SDK
+OPENAI_VECTOR_STORE_ID = os.getenv('OPENAI_VECTOR_STORE_ID')
 
-def upload_to_assistant(doc_file, assistant_id=None, purpose="table_documentation"):
+# Максимальное число одновременных загрузок файлов, чтобы не упираться в лимиты OpenAI
+UPLOAD_MAX_CONCURRENCY = 16
+
+# Пул соединений рассчитан на все одновременные загрузки плюс запрос к ассистенту,
+# чтобы соединения не создавались заново и не ждали освобождения пула
+UPLOAD_HTTP_LIMITS = httpx.Limits(
+    max_connections=UPLOAD_MAX_CONCURRENCY + 1,
+    max_keepalive_connections=UPLOAD_MAX_CONCURRENCY + 1
+)
+UPLOAD_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Контрольные суммы уже загруженной документации: ID ассистента -> {sha256: ID файла}
+UPLOAD_CACHE_FILE = ".upload_cache.json"
+
+# Клиенты OpenAI по API ключу: повторные загрузки используют один пул соединений
+_client_cache = {}
+
+def _get_client(api_key):
     """
-    Загружает файл документации в OpenAI Assistant
+    Возвращает клиент OpenAI для API ключа, создавая его только при первом обращении
     
     Args:
-        doc_file (str): Путь к файлу документации
-        assistant_id (str, optional): ID ассистента OpenAI
-        purpose (str, optional): Назначение файла
+        api_key (str): API ключ OpenAI
         
     Returns:
-        dict: Результат загрузки
+        openai.OpenAI: Клиент OpenAI
+    """
+    client = _client_cache.get(api_key)
+    if client is None:
+        client = _client_cache[api_key] = openai.OpenAI(
+            api_key=api_key,
+            http_client=httpx.Client(limits=UPLOAD_HTTP_LIMITS, timeout=UPLOAD_HTTP_TIMEOUT)
+        )
+    return client
+
+def _create_file(client, doc_file):
+    """Загружает файл документации в OpenAI и возвращает объект файла"""
+    # Файл остается открытым на все время запроса и передается потоком;
+    # тип содержимого указываем явно, а не по таблице mimetypes системы
+    with open(doc_file, "rb") as file:
+        return client.files.create(
+            file=(os.path.basename(doc_file), file, "text/markdown"),
+            purpose="assistants"
+        )
+
+def _validate(doc_files, assistant_id):
+    """
+    Проверяет настройки и файлы документации перед загрузкой
+    
+    Returns:
+        str: Текст ошибки или None, если все в порядке
     """
     if not OPENAI_API_KEY:
-        logger.error("Не задан API ключ OpenAI. Добавьте OPENAI_API_KEY в файл .env")
-        return None
+        return "Не задан API ключ OpenAI. Добавьте OPENAI_API_KEY в файл .env"
+    
+    if not assistant_id:
+        return "Не задан ID ассистента OpenAI. Добавьте OPENAI_ASSISTANT_ID в файл .env или укажите через параметр --assistant-id"
+    
+    for doc_file in doc_files:
+        try:
+            file_stat = os.stat(doc_file)
+        except OSError:
+            return f"Файл {doc_file} не найден"
+        if not stat.S_ISREG(file_stat.st_mode):
+            return f"{doc_file} не является файлом"
+        if not file_stat.st_size:
+            return f"Файл {doc_file} пуст"
+    
+    return None
+
+def _file_sha256(path):
+    """Считает SHA-256 файла, не читая его в память целиком"""
+    with open(path, "rb") as file:
+        # hashlib.file_digest появился только в Python 3.11
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(file, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _load_upload_cache():
+    """Читает контрольные суммы загруженной документации"""
+    try:
+        with open(UPLOAD_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_upload_cache(upload_cache):
+    """Сохраняет контрольные суммы загруженной документации"""
+    try:
+        with open(UPLOAD_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(upload_cache, f, indent=2)
+    except OSError as e:
+        logger.warning("Не удалось сохранить %s: %s", UPLOAD_CACHE_FILE, e)
+
+async def upload_many_to_assistant_async(doc_files, assistant_id=None, force=False):
+    """
+    Загружает несколько файлов документации одновременно и подключает их к ассистенту одним запросом
     
+    Args:
+        doc_files (list): Пути к файлам документации
+        assistant_id (str, optional): ID ассистента OpenAI
+        force (bool): Загружать даже документы, которые уже загружены без изменений
+        
+    Returns:
+        dict: Результат загрузки, file_ids - ID файлов в порядке doc_files
+            (для пропущенных документов - ID их прежней загрузки)
+    """
     assistant_id = assistant_id or OPENAI_ASSISTANT_ID
     
-    if not assistant_id:
-        logger.error("Не задан ID ассистента OpenAI. Добавьте OPENAI_ASSISTANT_ID в файл .env или укажите через параметр --assistant-id")
+    # Все проверки выполняются до создания клиента OpenAI
+    error = _validate(doc_files, assistant_id)
+    if error:
+        logger.error(error)
         return None
     
-    try:        # Инициализируем клиент OpenAI с API ключом
-        client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        
-        # Загружаем файл
-        with open(doc_file, "rb") as file:
-            file_upload = client.files.create(
-                file=file,
-                purpose="assistants"
-            )
-        
-        logger.info(f"Файл успешно загружен. ID файла: {file_upload.id}")
-        
-        # Подключаем файл к ассистенту
-        current_assistant = client.beta.assistants.retrieve(
-            assistant_id=assistant_id
-        )
-        
-        # Получаем список уже имеющихся файлов
-        existing_files = getattr(current_assistant, 'file_ids', [])
-        
-        # Добавляем новый файл
-        updated_assistant = client.beta.assistants.update(
-            assistant_id=assistant_id,
-            file_ids=[file_upload.id] + existing_files
-        )
-        
-        # Создаем сообщение для залогирования успешной операции
-        file_count = len(getattr(updated_assistant, 'file_ids', []))
-        
-        result = {
+    # Документы с тем же содержимым, что уже загружено в этого ассистента, пропускаем
+    upload_cache = _load_upload_cache()
+    uploaded = upload_cache.setdefault(assistant_id, {})
+    digests = [_file_sha256(doc_file) for doc_file in doc_files]
+    pending = {}
+    for doc_file, digest in zip(doc_files, digests):
+        if not force and digest in uploaded:
+            logger.info("Документация %s не изменилась с последней загрузки, пропускаем", doc_file)
+        elif digest not in pending:
+            pending[digest] = doc_file
+    
+    if not pending:
+        return {
             "success": True,
-            "file_id": file_upload.id,
+            "skipped": True,
+            "file_ids": [uploaded[digest] for digest in digests],
             "assistant_id": assistant_id,
-            "total_files": file_count,
-            "message": f"Документация успешно загружена в ассистента. Теперь у ассистента {file_count} файлов."
+            "message": "Документация не изменилась с последней загрузки, повторная загрузка пропущена."
         }
+    doc_files = list(pending.values())
+    
+    try:
+        # Получаем клиент OpenAI для API ключа
+        client = _get_client(OPENAI_API_KEY)
+        
+        semaphore = asyncio.Semaphore(UPLOAD_MAX_CONCURRENCY)
+        
+        async def upload(doc_file):
+            async with semaphore:
+                return await asyncio.to_thread(_create_file, client, doc_file)
         
-        return result
+        uploads = [upload(doc_file) for doc_file in doc_files]
+        
+        vector_stores = getattr(client.beta, 'vector_stores', None)
+        if OPENAI_VECTOR_STORE_ID and vector_stores is not None:
+            # Файлы добавляются в векторное хранилище без передачи всего списка файлов
+            # ассистента; загрузка и получение хранилища идут одновременно
+            *file_uploads, vector_store = await asyncio.gather(
+                *uploads,
+                asyncio.to_thread(vector_stores.retrieve, vector_store_id=OPENAI_VECTOR_STORE_ID)
+            )
+            new_file_ids = [file_upload.id for file_upload in file_uploads]
+            
+            if len(new_file_ids) == 1:
+                await asyncio.to_thread(
+                    vector_stores.files.create,
+                    vector_store_id=OPENAI_VECTOR_STORE_ID,
+                    file_id=new_file_ids[0]
+                )
+            else:
+                await asyncio.to_thread(
+                    vector_stores.file_batches.create,
+                    vector_store_id=OPENAI_VECTOR_STORE_ID,
+                    file_ids=new_file_ids
+                )
+            
+            # Создаем сообщение для залогирования успешной операции
+            file_count = vector_store.file_counts.total + len(new_file_ids)
+        else:
+            # Загрузка файлов и получение ассистента не зависят друг от друга - выполняем их одновременно
+            *file_uploads, current_assistant = await asyncio.gather(
+                *uploads,
+                asyncio.to_thread(client.beta.assistants.retrieve, assistant_id=assistant_id)
+            )
+            new_file_ids = [file_upload.id for file_upload in file_uploads]
+            
+            # Получаем список уже имеющихся файлов
+            existing_files = current_assistant.file_ids or []
+            file_ids = new_file_ids + existing_files
+            
+            # Добавляем новые файлы
+            await asyncio.to_thread(
+                client.beta.assistants.update,
+                assistant_id=assistant_id,
+                file_ids=file_ids
+            )
+            
+            # Создаем сообщение для залогирования успешной операции
+            file_count = len(file_ids)
         
     except Exception as e:
-        logger.error(f"Ошибка при загрузке документации: {str(e)}")
+        logger.error("Ошибка при загрузке документации: %s", e)
         return {
             "success": False,
             "error": str(e)
         }
+    
+    # Запросы к API выполнены - дальше только локальная обработка результата
+    for file_id in new_file_ids:
+        logger.info("Файл успешно загружен. ID файла: %s", file_id)
+    
+    uploaded.update(zip(pending, new_file_ids))
+    _save_upload_cache(upload_cache)
+    
+    return {
+        "success": True,
+        "file_ids": [uploaded[digest] for digest in digests],
+        "assistant_id": assistant_id,
+        "total_files": file_count,
+        "message": f"Документация успешно загружена в ассистента. Теперь у ассистента {file_count} файлов."
+    }
+
+async def upload_to_assistant_async(doc_file, assistant_id=None, purpose="table_documentation", force=False):
+    """
+    Загружает файл документации в OpenAI Assistant, выполняя независимые запросы параллельно
+    
+    Args:
+        doc_file (str): Путь к файлу документации
+        assistant_id (str, optional): ID ассистента OpenAI
+        purpose (str, optional): Назначение файла
+        force (bool): Загружать, даже если документ уже загружен без изменений
+        
+    Returns:
+        dict: Результат загрузки
+    """
+    result = await upload_many_to_assistant_async([doc_file], assistant_id, force)
+    if result and result.get("success") and result["file_ids"]:
+        result["file_id"] = result["file_ids"][0]
+    return result
 
-def main():
+def upload_to_assistant(doc_file, assistant_id=None, purpose="table_documentation", force=False):
+    """
+    Загружает файл документации в OpenAI Assistant
+    
+    Args:
+        doc_file (str): Путь к файлу документации
+        assistant_id (str, optional): ID ассистента OpenAI
+        purpose (str, optional): Назначение файла
+        force (bool): Загружать, даже если документ уже загружен без изменений
+        
+    Returns:
+        dict: Результат загрузки
+    """
+    return asyncio.run(upload_to_assistant_async(doc_file, assistant_id, purpose, force))
+
+def upload_many_to_assistant(doc_files, assistant_id=None, force=False):
+    """
+    Загружает несколько файлов документации в OpenAI Assistant за одно обновление ассистента
+    
+    Args:
+        doc_files (list): Пути к файлам документации
+        assistant_id (str, optional): ID ассистента OpenAI
+        force (bool): Загружать даже документы, которые уже загружены без изменений
+        
+    Returns:
+        dict: Результат загрузки
+    """
+    return asyncio.run(upload_many_to_assistant_async(doc_files, assistant_id, force))
+
+def find_documentation_files():
+    """
+    Возвращает все файлы документации в текущем каталоге, от старых к новым
+    
+    Returns:
+        list: Имена файлов table_documentation_*.md
+    """
+    with os.scandir('.') as entries:
+        doc_files = [
+            (entry.stat().st_ctime, entry.name) for entry in entries
+            if entry.name.startswith('table_documentation_') and entry.name.endswith('.md')
+        ]
+    return [name for _, name in sorted(doc_files)]
+
+def find_latest_documentation_file():
+    """
+    Находит самый свежий файл документации за один проход по каталогу
+    
+    Returns:
+        str: Имя файла или None, если файлов документации нет
+    """
+    latest_file = None
+    latest_ctime = 0
+    with os.scandir('.') as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('table_documentation_') and name.endswith('.md'):
+                ctime = entry.stat().st_ctime
+                if latest_file is None or ctime > latest_ctime:
+                    latest_file = name
+                    latest_ctime = ctime
+    return latest_file
+
+async def main():
     """
     Основная функция скрипта
     """
     parser = argparse.ArgumentParser(description='Загрузка документации о структуре таблиц в OpenAI Assistant')
-    parser.add_argument('--file', '-f', help='Путь к файлу документации (по умолчанию - последний созданный file_documentation_*.md)')
+    files_group = parser.add_mutually_exclusive_group()
+    files_group.add_argument('--file', '-f', help='Путь к файлу документации (по умолчанию - последний созданный file_documentation_*.md)')
+    files_group.add_argument('--all', action='store_true', help='Загрузить все файлы table_documentation_*.md одновременно')
     parser.add_argument('--assistant-id', '-a', help='ID ассистента OpenAI (если не указан в .env)')
+    parser.add_argument('--force', action='store_true', help='Загрузить документацию, даже если она не изменилась с последней загрузки')
     args = parser.parse_args()
     
-    # Если файл не указан, ищем последний созданный
-    if not args.file:
-        doc_files = [f for f in os.listdir('.') if f.startswith('table_documentation_') and f.endswith('.md')]
+    if args.all:
+        doc_files = find_documentation_files()
         if not doc_files:
             logger.error("Не найдено файлов документации. Запустите сначала generate_tables_docs.py")
             return
         
-        # Сортируем по дате создания (самый новый первый)
-        latest_file = max(doc_files, key=lambda f: os.path.getctime(f))
-        doc_file = latest_file
-        logger.info(f"Используем самый свежий файл документации: {doc_file}")
+        logger.info("Загружаем %d файлов документации", len(doc_files))
+        result = await upload_many_to_assistant_async(doc_files, args.assistant_id, args.force)
+    
     else:
-        doc_file = args.file
+        # Если файл не указан, ищем последний созданный
+        if not args.file:
+            doc_file = find_latest_documentation_file()
+            if not doc_file:
+                logger.error("Не найдено файлов документации. Запустите сначала generate_tables_docs.py")
+                return
+            
+            logger.info("Используем самый свежий файл документации: %s", doc_file)
+        else:
+            doc_file = args.file
         
-    # Проверяем существование файла
-    if not os.path.exists(doc_file):
-        logger.error(f"Файл {doc_file} не найден")
-        return
-    
-    # Загружаем в ассистента
-    result = upload_to_assistant(doc_file, args.assistant_id)
+        # Загружаем в ассистента
+        result = await upload_to_assistant_async(doc_file, args.assistant_id, force=args.force)
     
-    if result and result.get("success"):
+    if result and result.get("skipped"):
+        print("\n" + "=" * 70)
+        print(result["message"])
+        print(f"ID ассистента: {result['assistant_id']}")
+        print("Для повторной загрузки используйте --force")
+        print("=" * 70 + "\n")
+    elif result and result.get("success"):
         print("\n" + "=" * 70)
         print(f"Документация успешно загружена в OpenAI Assistant!")
-        print(f"ID файла: {result['file_id']}")
+        if len(result['file_ids']) == 1:
+            print(f"ID файла: {result['file_ids'][0]}")
+        else:
+            print(f"ID файлов: {', '.join(result['file_ids'])}")
         print(f"ID ассистента: {result['assistant_id']}")
         print(f"Всего файлов у ассистента: {result['total_files']}")
         print("=" * 70 + "\n")
@@ -141,4 +393,4 @@ def main():
         print("=" * 70 + "\n")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())